@@ -0,0 +1,80 @@
+## ANN benchmark: build time, query latency, memory and recall@k of each index type vs. exact search.
+## Run from the project root:  python -m benchmarks.bench_ann_index [--vectors 100000 --dim 256 --json]
+import json
+import time
+import argparse
+
+import faiss
+import numpy as np
+
+from src.news_summarizer.index_factory import IndexFactory
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_sq8", "ivf_pq")
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int = 64, seed: int = 0) -> np.ndarray:
+    """Gaussian blobs: embeddings of news text are clustered by topic, not uniform."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype("float32")
+    labels = rng.integers(0, clusters, size=n)
+    return (centers[labels] + 0.35 * rng.normal(size=(n, dim))).astype("float32")
+
+
+def _percentile(samples, q: float) -> float:
+    return float(np.percentile(samples, q)) if samples else 0.0
+
+
+def run(n_vectors: int = 50_000, dim: int = 256, n_queries: int = 200, k: int = 10, types=INDEX_TYPES,
+        factory: IndexFactory = None) -> dict:
+    factory = factory or IndexFactory()
+    data = synthetic_vectors(n_vectors + n_queries, dim)
+    vectors, queries = data[:n_vectors], data[n_vectors:]
+
+    exact = faiss.IndexFlatL2(dim)
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    results = {}
+    for index_type in types:
+        started = time.perf_counter()
+        index = factory.build(index_type, vectors)
+        build_s = time.perf_counter() - started
+
+        latencies, found = [], []
+        for query in queries:  # one at a time, as the chat retriever queries
+            started = time.perf_counter()
+            _, ids = index.search(query[None, :], k)
+            latencies.append((time.perf_counter() - started) * 1000)
+            found.append(ids[0])
+        recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+
+        results[index_type] = {
+            "build_s": round(build_s, 3),
+            "p50_ms": round(_percentile(latencies, 50), 3),
+            "p99_ms": round(_percentile(latencies, 99), 3),
+            "memory_mb": round(len(faiss.serialize_index(index)) / 1e6, 2),
+            f"recall@{k}": round(float(recall), 4),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vectors", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.vectors, args.dim, args.queries, args.k, args.types,
+                  IndexFactory(nprobe=args.nprobe, ef_search=args.ef_search))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries, k={args.k}")
+        for index_type, row in results.items():
+            print(f"  {index_type:<9}" + "  ".join(f"{key}={value}" for key, value in row.items()))
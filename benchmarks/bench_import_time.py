@@ -0,0 +1,79 @@
+## Startup benchmark: cost of importing a module in a fresh interpreter, from `python -X importtime`.
+## Run from the project root:  python -m benchmarks.bench_import_time [--module src.news_summarizer.chat_module]
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+import statistics
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_MODULE = "src.news_summarizer.chat_module"
+# SDKs that should only load when a provider is actually used
+HEAVY_MODULES = ("langchain_openai", "langchain_google_genai", "langchain_groq", "streamlit", "langchain.chains")
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_report(module: str) -> dict:
+    """One fresh-interpreter import of `module`, parsed from the -X importtime trace."""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({"module": name, "self_us": int(self_us),
+                            "cumulative_us": int(cumulative_us), "depth": len(indent) // 2})
+
+    target = next((e for e in entries if e["module"] == module), None)
+    top_level = sorted((e for e in entries if e["depth"] == 1), key=lambda e: -e["cumulative_us"])
+    loaded = {e["module"] for e in entries}
+    return {
+        "module": module,
+        "process_wall_ms": round(wall_ms, 1),
+        "import_ms": round(target["cumulative_us"] / 1000, 1) if target else None,
+        "modules_loaded": len(entries),
+        "heavy_modules_loaded": sorted(m for m in HEAVY_MODULES if m in loaded),
+        "top_direct_imports": [
+            {"module": e["module"], "cumulative_ms": round(e["cumulative_us"] / 1000, 1)} for e in top_level[:10]
+        ],
+    }
+
+
+def run(module: str = DEFAULT_MODULE, repeat: int = 5) -> dict:
+    """Median over `repeat` cold imports, plus the breakdown of the median run."""
+    reports = [import_report(module) for _ in range(repeat)]
+    reports.sort(key=lambda r: r["import_ms"] or 0)
+    median = reports[len(reports) // 2]
+    median["import_ms_runs"] = [r["import_ms"] for r in reports]
+    median["import_ms_median"] = statistics.median(r["import_ms"] for r in reports)
+    return median
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time a cold import with python -X importtime")
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args.module, args.repeat)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import {report['module']}: {report['import_ms_median']} ms median "
+              f"({report['modules_loaded']} modules, process {report['process_wall_ms']} ms)")
+        print(f"heavy modules loaded: {report['heavy_modules_loaded'] or 'none'}")
+        for entry in report["top_direct_imports"]:
+            print(f"  {entry['cumulative_ms']:>8} ms  {entry['module']}")
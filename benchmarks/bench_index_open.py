@@ -0,0 +1,74 @@
+## Cold-start benchmark: time to open a saved index (pickle load_local vs. mmap + SQLite) by corpus size.
+## Run from the project root:  python -m benchmarks.bench_index_open [--sizes 10000 100000 --dim 768]
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import FakeEmbeddings
+
+from src.news_summarizer.index_store import FaissIndexStore
+
+
+def build_store(n_vectors: int, dim: int, embeddings) -> FAISS:
+    rng = np.random.default_rng(0)
+    index = faiss.IndexFlatL2(dim)
+    index.add(rng.random((n_vectors, dim), dtype="float32"))
+    text = "Shares of the company rose after quarterly revenue beat estimates. " * 12
+    docs = {str(i): Document(page_content=f"{i} {text}", metadata={"source": f"news_{i % 500}.txt"})
+            for i in range(n_vectors)}
+    return FAISS(embeddings, index, InMemoryDocstore(docs), {i: str(i) for i in range(n_vectors)})
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def run(sizes=(10_000, 50_000), dim: int = 768, repeat: int = 5) -> dict:
+    embeddings = FakeEmbeddings(size=dim)
+    query = np.random.default_rng(1).random((1, dim), dtype="float32")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_vectors in sizes:
+            store = build_store(n_vectors, dim, embeddings)
+            legacy_dir, new_dir = Path(tmp) / f"pickle_{n_vectors}", Path(tmp) / f"sqlite_{n_vectors}"
+            store.save_local(str(legacy_dir))
+            index_store = FaissIndexStore(str(new_dir), embeddings)
+            index_store.save(store)
+            del store
+
+            def first_hit_legacy():
+                vs = FAISS.load_local(str(legacy_dir), embeddings, allow_dangerous_deserialization=True)
+                vs.similarity_search_by_vector(query[0].tolist(), k=5)
+
+            def first_hit_mmap():
+                vs = index_store.open_readonly()
+                vs.similarity_search_by_vector(query[0].tolist(), k=5)
+
+            results[n_vectors] = {
+                "pickle_open_and_query_ms": round(_median_ms(first_hit_legacy, repeat), 1),
+                "mmap_sqlite_open_and_query_ms": round(_median_ms(first_hit_mmap, repeat), 1),
+            }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for n_vectors, row in run(args.sizes, args.dim, args.repeat).items():
+        print(f"{n_vectors:>8} vectors  " + "  ".join(f"{key}={value}" for key, value in row.items()))
@@ -0,0 +1,59 @@
+## Micro-benchmark: article extraction over saved HTML fixtures.
+## Run from the project root:  python -m benchmarks.bench_parse_article
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+from src.news_summarizer.article_extractor import available_backends, extract_article
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "html"
+
+
+def legacy_parse(html: str) -> dict:
+    """The pre-optimization parse_article path: full html.parser tree, repeated lookups."""
+    soup = BeautifulSoup(html, "html.parser")
+    headline = soup.find("h1").get_text(strip=True) if soup.find("h1") else ""
+    bullets = [
+        li.get_text(strip=True)
+        for li in soup.find_all("li")
+        if "key points" in li.text.lower() or li.text.startswith("*")
+    ]
+    paragraphs = [p.get_text(strip=True) for p in soup.find_all("p")]
+    return {"headline": headline, "key_points": bullets, "paragraphs": paragraphs}
+
+
+def time_it(fn, html: str, repeat: int) -> float:
+    """Median milliseconds per call."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(html)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def run(repeat: int = 20) -> dict:
+    results = {}
+    for fixture in sorted(FIXTURES_DIR.glob("*.html")):
+        html = fixture.read_text(encoding="utf-8")
+        baseline = time_it(legacy_parse, html, repeat)
+        row = {"bytes": len(html), "legacy_ms": round(baseline, 3)}
+        for backend in available_backends():
+            ms = time_it(lambda h, b=backend: extract_article(h, backend=b), html, repeat)
+            row[f"{backend}_ms"] = round(ms, 3)
+            row[f"{backend}_speedup"] = round(baseline / ms, 2)
+        results[fixture.name] = row
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for name, row in run(args.repeat).items():
+        print(f"\n{name} ({row.pop('bytes')} bytes)")
+        for key, value in row.items():
+            print(f"  {key:<24}{value}")
@@ -0,0 +1,83 @@
+## Throughput benchmark: annual-report PDF parsing (pages/s) as the worker count grows.
+## Run from the project root:  python -m benchmarks.bench_report_ingestion [--pages 300 --workers 1 2 4]
+import os
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+from src.annual_report_analyzer.report_ingestion import AnnualReportIngestor
+
+SECTIONS = ("CHAIRMAN'S LETTER", "MANAGEMENT DISCUSSION AND ANALYSIS", "RISK FACTORS",
+            "CORPORATE GOVERNANCE", "FINANCIAL STATEMENTS")
+
+
+class _NoIndex:
+    """Stands in for NewsIngestor: parsing only, nothing is embedded."""
+    model_loader = type("Loader", (), {"config": {}})()
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_report_pdf(path: Path, pages: int, lines_per_page: int = 45) -> None:
+    """Write a plain-text PDF shaped like an annual report: running header, section headings, dense paragraphs."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        lines = ["ACME HOLDINGS ANNUAL REPORT 2024"]
+        if page % max(1, pages // len(SECTIONS)) == 0:
+            lines.append(SECTIONS[min(len(SECTIONS) - 1, page // max(1, pages // len(SECTIONS)))])
+        lines += [f"Line {i} on page {page + 1}: revenue rose {i % 17} percent while operating margin "
+                  f"held at {20 + i % 5} percent across the segment." for i in range(lines_per_page)]
+        body = "BT /F1 8 Tf 10 TL 36 806 Td " + " ".join(f"({_escape(l)}) '" for l in lines) + " ET"
+        objects.append(f"<< /Length {len(body)} >>\nstream\n{body}\nendstream")
+        content_ref = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_ref} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(bytes(out))
+
+
+def run(pages: int = 300, reports: int = 2, workers=(1, 2, 4), pages_per_task: int = 8) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for n in range(reports):
+            paths.append(Path(tmp) / f"report_{n}.pdf")
+            write_report_pdf(paths[-1], pages)
+        for count in workers:
+            ingestor = AnnualReportIngestor(max_workers=count, pages_per_task=pages_per_task, ingestor=_NoIndex())
+            report = {"files": 0, "pages": 0, "failed": []}
+            started = time.perf_counter()
+            segments = sum(1 for _ in ingestor.iter_documents(paths, report))
+            seconds = time.perf_counter() - started
+            results[count] = {"pages": report["pages"], "segments": segments,
+                              "seconds": round(seconds, 3), "pages_per_s": round(report["pages"] / seconds, 1)}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=300, help="pages per generated report")
+    parser.add_argument("--reports", type=int, default=2)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--pages-per-task", type=int, default=8)
+    args = parser.parse_args()
+
+    results = run(args.pages, args.reports, args.workers, args.pages_per_task)
+    baseline = results[min(results)]["pages_per_s"]
+    for count, row in results.items():
+        print(f"workers={count:<3} {row['pages']} pages  {row['seconds']:>7}s  "
+              f"{row['pages_per_s']:>8} pages/s  x{row['pages_per_s'] / baseline:.2f}")
@@ -0,0 +1,222 @@
+## Offline benchmark suite: ingestion, retrieval, chat (end-to-end and per stage) and scraping, all on local stand-ins.
+## Run from the project root:  python -m benchmarks.run_suite [--out benchmarks/results/latest.json] [--compare baseline.json]
+## Metrics ending in _ms / _seconds are lower-is-better, those ending in _per_s higher-is-better.
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Dict, List
+
+# the stand-ins replace every provider client; ModelLoader only checks that keys are present
+for _key in ("GOOGLE_API_KEY", "GROQ_API_KEY", "OPENAI_API_KEY", "NEWS_API_KEY"):
+    os.environ.setdefault(_key, "offline-benchmark")
+
+from benchmarks.stand_ins import FixtureServer, HashEmbeddings, LatencyChatModel
+from src.news_summarizer.chat_module import ConversationalRAG
+from src.news_summarizer.data_ingestion import NewsIngestor
+from src.news_summarizer.http_cache import MemoryResponseCache
+from src.news_summarizer.news_parser import StockNewsFetcher
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_OUT = Path(__file__).parent / "results" / "latest.json"
+
+_SENTENCES = (
+    "Shares of {c} rose {n} percent after the company reported quarterly revenue above analyst estimates.",
+    "Management raised full-year guidance, citing strong demand for {c} products in Asia and Europe.",
+    "Operating margin narrowed to {n} percent as input costs and logistics expenses climbed.",
+    "Analysts at several brokerages lifted their price targets on {c} following the earnings call.",
+    "The board approved a buyback of up to {n} billion dollars over the next two years.",
+    "Regulators opened an inquiry into {c} supply contracts, though no charges have been filed.",
+)
+COMPANIES = ("Tesla", "Nvidia", "Apple", "Microsoft", "Amazon", "Alphabet", "Meta", "Netflix")
+QUESTIONS = (
+    "How did Tesla shares react to the quarterly results?",
+    "What did they say about margins?",
+    "Which analysts changed their price targets on Nvidia?",
+    "Is there a buyback planned at Apple?",
+    "What about their guidance for next year?",
+    "Are regulators investigating Amazon supply contracts?",
+)
+
+
+def _percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"p50_ms": round(statistics.median(ordered), 3), "p90_ms": round(pick(0.9), 3),
+            "p99_ms": round(pick(0.99), 3), "mean_ms": round(statistics.fmean(ordered), 3)}
+
+
+def write_corpus(directory: Path, n_files: int, paragraphs: int) -> List[str]:
+    """Deterministic news-like text files."""
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(n_files):
+        company = COMPANIES[i % len(COMPANIES)]
+        text = "\n\n".join(
+            " ".join(s.format(c=company, n=(i * 7 + p * 3 + j) % 40 + 1) for j, s in enumerate(_SENTENCES))
+            + f" (report {i}, section {p})"
+            for p in range(paragraphs)
+        )
+        path = directory / f"{company.lower()}_{i:04d}.txt"
+        path.write_text(text, encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+
+def bench_ingestion(workdir: Path, n_files: int, paragraphs: int, dim: int) -> dict:
+    paths = write_corpus(workdir / "corpus", n_files, paragraphs)
+    total_bytes = sum(os.path.getsize(p) for p in paths)
+    embeddings = HashEmbeddings(dim=dim)
+    ingestor = NewsIngestor(faiss_dir=str(workdir / "faiss"), embeddings=embeddings)
+
+    started = time.perf_counter()
+    ingestor.ingest_files(paths, append=False)
+    cold = time.perf_counter() - started
+    chunks = ingestor.last_ingest_report["new_chunks"]
+
+    started = time.perf_counter()
+    ingestor.ingest_files(paths)  # everything already indexed: measures the dedup path
+    warm = time.perf_counter() - started
+    return {
+        "files": n_files, "chunks": chunks, "mb": round(total_bytes / 1e6, 2),
+        "cold_seconds": round(cold, 3), "files_per_s": round(n_files / cold, 1),
+        "chunks_per_s": round(chunks / cold, 1), "mb_per_s": round(total_bytes / 1e6 / cold, 2),
+        "reingest_seconds": round(warm, 3), "embedding_calls": embeddings.calls,
+    }
+
+
+def bench_retrieval(workdir: Path, dim: int, queries: int) -> dict:
+    ingestor = NewsIngestor(faiss_dir=str(workdir / "faiss"), embeddings=HashEmbeddings(dim=dim))
+    started = time.perf_counter()
+    retriever = ingestor.load_retriever()
+    open_ms = (time.perf_counter() - started) * 1000
+
+    samples = []
+    for i in range(queries):
+        question = QUESTIONS[i % len(QUESTIONS)] + f" ({i})"  # unique text, no embedding cache effects
+        started = time.perf_counter()
+        retriever.invoke(question)
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"queries": queries, "open_ms": round(open_ms, 3), **_percentiles(samples)}
+
+
+def bench_chat(workdir: Path, dim: int, turns: int, first_token_latency: float, tokens_per_second: float) -> dict:
+    ingestor = NewsIngestor(faiss_dir=str(workdir / "faiss"), embeddings=HashEmbeddings(dim=dim))
+    llm = LatencyChatModel(first_token_latency=first_token_latency, tokens_per_second=tokens_per_second)
+    rag = ConversationalRAG(session_id=f"bench-{time.time_ns()}", retriever=ingestor.load_retriever(), llm=llm)
+
+    stage_names = ("rewrite", "embed_query", "retrieve", "format_docs", "generate")
+    totals, stages = [], {name: [] for name in stage_names + ("overhead",)}
+    for i in range(turns):
+        started = time.perf_counter()
+        rag.invoke(QUESTIONS[i % len(QUESTIONS)])
+        total = (time.perf_counter() - started) * 1000
+        totals.append(total)
+        # per-stage wall time from the turn's trace; stages a turn skipped count as 0
+        stage_ms = rag.last_trace["stages_ms"]
+        for name in stage_names:
+            stages[name].append(stage_ms.get(name, 0.0))
+        stages["overhead"].append(total - sum(stage_ms.get(name, 0.0) for name in stage_names))
+    return {
+        "turns": turns, "llm_first_token_s": first_token_latency, "llm_tokens_per_s": tokens_per_second,
+        "end_to_end": _percentiles(totals),
+        "stages": {name: _percentiles(samples) for name, samples in stages.items()},
+    }
+
+
+def bench_scrape(articles: int, latency: float, rounds: int) -> dict:
+    results = {}
+    with FixtureServer(latency=latency) as server:
+        for label, cache in (("cold", None), ("cached", MemoryResponseCache())):
+            fetcher = StockNewsFetcher(api_key="offline-benchmark", cache=cache, use_cache=cache is not None)
+            fetcher.news_endpoint = f"{server.url}/v2/top-headlines"
+            samples = []
+            for _ in range(rounds):
+                started = time.perf_counter()
+                parsed = fetcher.get_news_with_content("Tesla", limit=articles)
+                samples.append(time.perf_counter() - started)
+            best = min(samples)
+            results[label] = {"articles": len(parsed), "seconds": round(statistics.median(samples), 3),
+                              "articles_per_s": round(len(parsed) / best, 1)}
+        results["server_latency_s"] = latency
+    return results
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, timeout=10).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def run(quick: bool = False) -> dict:
+    scale = 0.2 if quick else 1.0
+    dim = 384
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        results = {
+            "ingestion": bench_ingestion(workdir, n_files=max(5, int(200 * scale)), paragraphs=12, dim=dim),
+            "retrieval": bench_retrieval(workdir, dim=dim, queries=max(20, int(300 * scale))),
+            "chat": bench_chat(workdir, dim=dim, turns=max(4, int(20 * scale)),
+                               first_token_latency=0.05, tokens_per_second=400.0),
+            "scrape": bench_scrape(articles=max(8, int(32 * scale)), latency=0.05, rounds=3),
+        }
+    return {
+        "meta": {"revision": _git_revision(), "python": platform.python_version(),
+                 "platform": platform.platform(), "cpus": os.cpu_count(),
+                 "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "quick": quick},
+        "results": results,
+    }
+
+
+def _flatten(tree: dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in tree.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Metrics that got worse than the baseline by more than `tolerance` (0.2 = 20%)."""
+    now, before = _flatten(current["results"]), _flatten(baseline["results"])
+    regressions = []
+    for key, value in now.items():
+        old = before.get(key)
+        if not old:
+            continue
+        if key.endswith(("_ms", "_seconds")) and value > old * (1 + tolerance):
+            regressions.append(f"{key}: {old} -> {value} (+{(value / old - 1) * 100:.0f}%)")
+        elif key.endswith("_per_s") and value < old * (1 - tolerance):
+            regressions.append(f"{key}: {old} -> {value} ({(value / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT, help="where to write the JSON results")
+    parser.add_argument("--compare", type=Path, help="baseline JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before flagging (0.2 = 20%%)")
+    parser.add_argument("--quick", action="store_true", help="smaller workloads, for a fast sanity run")
+    args = parser.parse_args()
+
+    report = run(quick=args.quick)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(json.dumps(report["results"], indent=2))
+    print(f"\nresults written to {args.out}")
+
+    if args.compare:
+        regressions = compare(report, json.loads(args.compare.read_text(encoding="utf-8")), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if regressions else 0)
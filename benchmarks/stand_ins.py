@@ -0,0 +1,161 @@
+## Deterministic local stand-ins for the benchmarks: no network, no API keys, no model downloads.
+import time
+import json
+import asyncio
+import hashlib
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, AsyncIterator, Iterator, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "html"
+
+_WORDS = ("revenue", "margin", "guidance", "shares", "quarter", "analysts", "demand", "growth",
+          "outlook", "earnings", "investors", "market", "supply", "costs", "forecast", "sales")
+
+
+class HashEmbeddings(Embeddings):
+    """Unit vectors seeded from the text's sha256: same text, same vector, on any machine."""
+
+    def __init__(self, dim: int = 384, latency_per_call: float = 0.0):
+        """
+        :param dim: vector size
+        :param latency_per_call: seconds slept per embed call, to stand in for a remote API
+        """
+        self.dim = dim
+        self.latency_per_call = latency_per_call
+        self.calls = 0
+        self.texts = 0
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim)
+        return (vector / np.linalg.norm(vector)).astype("float32").tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        self.texts += len(texts)
+        if self.latency_per_call:
+            time.sleep(self.latency_per_call)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class LatencyChatModel(BaseChatModel):
+    """
+    Chat model that answers after `first_token_latency` seconds and then emits
+    `reply_tokens` words at `tokens_per_second`. Every call's duration is recorded.
+    """
+
+    first_token_latency: float = 0.2
+    tokens_per_second: float = 80.0
+    reply_tokens: int = 60
+    call_seconds: List[float] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "latency-fake"
+
+    def _words(self, messages: List[BaseMessage]) -> List[str]:
+        seed = int.from_bytes(hashlib.sha256(str(messages[-1].content).encode("utf-8")).digest()[:4], "little")
+        return [_WORDS[(seed + i * 7) % len(_WORDS)] for i in range(self.reply_tokens)]
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        started = time.perf_counter()
+        time.sleep(self.first_token_latency + self.reply_tokens / self.tokens_per_second)
+        self.call_seconds.append(time.perf_counter() - started)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=" ".join(self._words(messages))))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        started = time.perf_counter()
+        time.sleep(self.first_token_latency)
+        for word in self._words(messages):
+            time.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+        self.call_seconds.append(time.perf_counter() - started)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        started = time.perf_counter()
+        await asyncio.sleep(self.first_token_latency + self.reply_tokens / self.tokens_per_second)
+        self.call_seconds.append(time.perf_counter() - started)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=" ".join(self._words(messages))))])
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        started = time.perf_counter()
+        await asyncio.sleep(self.first_token_latency)
+        for word in self._words(messages):
+            await asyncio.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+        self.call_seconds.append(time.perf_counter() - started)
+
+
+class FixtureServer:
+    """
+    Local HTTP server standing in for NewsAPI and the article sites:
+    `/v2/top-headlines?pageSize=N` lists N articles, `/articles/<i>.html` serves the saved
+    HTML fixtures in rotation. Each response is delayed by `latency` seconds.
+    """
+
+    def __init__(self, latency: float = 0.0, fixtures_dir: Path = FIXTURES_DIR):
+        self.latency = latency
+        self.pages = [p.read_bytes() for p in sorted(fixtures_dir.glob("*.html"))]
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                url = urlsplit(self.path)
+                if url.path == "/v2/top-headlines":
+                    size = int(parse_qs(url.query).get("pageSize", ["10"])[0])
+                    body = json.dumps({"status": "ok", "articles": [
+                        {"title": f"Fixture article {i}", "url": f"{server.url}/articles/{i}.html"} for i in range(size)
+                    ]}).encode("utf-8")
+                    content_type = "application/json"
+                elif url.path.startswith("/articles/"):
+                    index = int(Path(url.path).stem)
+                    body = server.pages[index % len(server.pages)]
+                    content_type = "text/html; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):  # keep benchmark output clean
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FixtureServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
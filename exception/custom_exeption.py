@@ -16,4 +16,15 @@ class CustomException(Exception):
         Message: [{self.error_message}]
         Traceback:
         {self.traceback_str}        
-        """
\ No newline at end of file
+        """
+
+def root_cause(error: BaseException) -> BaseException:
+    """First exception under any number of CustomException wrappers (the error itself if it is not one)."""
+    seen = set()
+    while isinstance(error, CustomException) and id(error) not in seen:
+        seen.add(id(error))
+        inner = error.__cause__ or error.__context__
+        if inner is None:
+            break
+        error = inner
+    return error
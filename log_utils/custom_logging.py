@@ -1,56 +1,131 @@
-
 import os
+import queue
+import atexit
+import random
 import logging
+import threading
 import structlog
 from datetime import datetime
+from typing import Dict, Optional
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-class CustomLogger:
-    def __init__(self, log_dir= "logs"):
+# Process-wide logging state: configured once by the first CustomLogger
+_CONFIG_LOCK = threading.Lock()
+_LISTENER: Optional[QueueListener] = None
+_LOG_FILE_PATH: Optional[str] = None
+
+
+def _load_logging_config() -> dict:
+    """`logging` block of config.yaml, or {} when the file is unavailable."""
+    try:
+        from utils.config_loader import load_config
+        return load_config().get("logging") or {}
+    except Exception:
+        return {}
 
-        # Ensure logs directory exists
-        self.logs_dir= os.path.join(os.getcwd(), log_dir)
-        os.makedirs(self.logs_dir, exist_ok=True)  # create a file directory if not exists
 
-        # create file - Timestamped for persistence
-        log_file= f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log" # naming
-        self.log_file_path= os.path.join(self.logs_dir, log_file) #path (not yet created)
+def _sample_events(sample_rates: Dict[str, float]):
+    """structlog processor: keep only `rate` of the events named in `sample_rates`."""
+    def processor(logger, method_name, event_dict):
+        rate = sample_rates.get(event_dict.get("event"))
+        # warnings and errors are never sampled away
+        if rate is not None and method_name in ("debug", "info") and random.random() >= rate:
+            raise structlog.DropEvent
+        return event_dict
+    return processor
 
-    def get_logger(self, name= __file__):
 
-        logger_name= os.path.basename(name)
+def _truncate_fields(max_chars: int):
+    """structlog processor: cap long string fields so one event can't cost a large write."""
+    def processor(logger, method_name, event_dict):
+        for key, value in event_dict.items():
+            if isinstance(value, str) and len(value) > max_chars:
+                event_dict[key] = f"{value[:max_chars]}...(+{len(value) - max_chars} chars)"
+        return event_dict
+    return processor
 
-        # configure logging for file(in json) - able to log info
-        file_handler= logging.FileHandler(self.log_file_path) # FileHandler: writes log on your disk in the file path
+
+def _configure(logs_dir: str, max_bytes: int, backup_count: int,
+               sample_rates: Dict[str, float], max_field_chars: int) -> str:
+    """
+    Route stdlib logging through a QueueHandler; a background QueueListener does the
+    file (size-rotated) and console writes. Idempotent: only the first call configures.
+    :return: path of the process's log file
+    """
+    global _LISTENER, _LOG_FILE_PATH
+    with _CONFIG_LOCK:
+        if _LISTENER is not None:
+            return _LOG_FILE_PATH
+
+        os.makedirs(logs_dir, exist_ok=True)  # create a file directory if not exists
+        log_file = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"  # one file per process
+        log_file_path = os.path.join(logs_dir, log_file)
+
+        # FileHandler: writes log on your disk, rolling over at max_bytes
+        file_handler = RotatingFileHandler(log_file_path, maxBytes=max_bytes, backupCount=backup_count)
         file_handler.setLevel(logging.INFO)
-        file_handler.setFormatter(logging.Formatter("%(message)s")) # Raw JSON
+        file_handler.setFormatter(logging.Formatter("%(message)s"))  # Raw JSON
 
         # Configure for console
-        console_handler= logging.StreamHandler()
+        console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.INFO)
         console_handler.setFormatter(logging.Formatter("%(message)s"))
 
-        logging.basicConfig(
-            level= logging.INFO,
-            format= "%(message)s", # JSON- structlog will handle
-            handlers=[file_handler, console_handler]
-        )
+        # callers only enqueue; disk and console I/O happen on the listener thread
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+
+        root = logging.getLogger()
+        root.setLevel(logging.INFO)
+        root.addHandler(QueueHandler(log_queue))
 
         # Configure structlog for JSON structured logging
         structlog.configure(
             processors=[
-                structlog.processors.TimeStamper(fmt= 'iso', utc=True, key= "timestamp"),
+                _sample_events(sample_rates),
+                _truncate_fields(max_field_chars),
+                structlog.processors.TimeStamper(fmt='iso', utc=True, key="timestamp"),
                 structlog.processors.add_log_level,
-                structlog.processors.EventRenamer(to= "event"),
+                structlog.processors.EventRenamer(to="event"),
                 structlog.processors.JSONRenderer()
             ],
             logger_factory=structlog.stdlib.LoggerFactory(),
-            cache_logger_on_first_use= True,
+            cache_logger_on_first_use=True,
         )
+
+        _LISTENER = listener
+        _LOG_FILE_PATH = log_file_path
+        return log_file_path
+
+
+class CustomLogger:
+    def __init__(self, log_dir: Optional[str] = None):
+        """
+        Cheap to construct: the logging pipeline is set up by the first instance in the
+        process and shared by every later one. Rotation, sampling and truncation come
+        from the `logging` block of config.yaml.
+        """
+        logging_config = _load_logging_config() if _LISTENER is None else {}
+
+        # Ensure logs directory exists
+        self.log_file_path = _configure(
+            os.path.join(os.getcwd(), log_dir or logging_config.get("log_dir", "logs")),
+            max_bytes=logging_config.get("max_bytes", 10 * 1024 * 1024),
+            backup_count=logging_config.get("backup_count", 5),
+            sample_rates=logging_config.get("sample_rates") or {},
+            max_field_chars=logging_config.get("max_field_chars", 500),
+        )
+        self.logs_dir = os.path.dirname(self.log_file_path)
+
+    def get_logger(self, name=__file__):
+        logger_name = os.path.basename(name)
         return structlog.get_logger(logger_name)
 
 # --- Usage Example ---
 
 if __name__ == "__main__":
-    logger= CustomLogger().get_logger(__file__)
-    logger.info("user uploaded a file", user_id= 123, filename= "report.pdf")
-    logger.error("Failed to process PDF", error= "File not found", user_id= 1234)
+    logger = CustomLogger().get_logger(__file__)
+    logger.info("user uploaded a file", user_id=123, filename="report.pdf")
+    logger.error("Failed to process PDF", error="File not found", user_id=1234)
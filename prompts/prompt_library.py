@@ -14,6 +14,21 @@ document_summarize_prompt = ChatPromptTemplate.from_template(
     {document_text}
     """
 )
+# PROMPT FOR MERGING ARTICLE SUMMARIES INTO ONE DIGEST
+
+news_digest_prompt = ChatPromptTemplate.from_template(
+    """
+    You are an expert at reading news in perspective of stock markets.
+    Below are summaries of today's news articles about {company}, most popular first.
+    Merge them into one digest for an investor: group related points, drop repeats,
+    keep figures, dates and sources' claims, and note where articles disagree.
+    Reply with the digest only, in at most 200 words.
+
+    Article summaries:
+    {summaries}
+    """
+)
+
 #  CONTEXTUALIZE QUESTION PROMPT
 qa_history_prompt = ChatPromptTemplate.from_messages([
     ("system", """
@@ -57,6 +72,23 @@ qa_context_history_prompt = ChatPromptTemplate.from_messages([
     ("human", "{input}")
 ])
 
+# PROMPT FOR ROLLING CHAT HISTORY SUMMARY
+
+history_summary_prompt = ChatPromptTemplate.from_template(
+    """
+    You maintain a running summary of a conversation about stock market news.
+    Update the summary with the new turns below. Keep tickers, companies, figures and
+    the user's open questions; drop pleasantries. Reply with the updated summary only,
+    in at most 150 words.
+
+    Current summary:
+    {summary}
+
+    New turns:
+    {transcript}
+    """
+)
+
 ## CENTRAL DICTIONARY TO REGISTER PROMPTS
 
 # PROMPT_REGISTRY = {
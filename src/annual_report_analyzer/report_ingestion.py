@@ -0,0 +1,250 @@
+import os
+import re
+import sys
+import multiprocessing as mp
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from log_utils.custom_logging import CustomLogger
+from exception.custom_exeption import CustomException
+from src.news_summarizer.data_ingestion import NewsIngestor
+
+PDF_SUFFIXES = {".pdf"}
+DOCX_SUFFIXES = {".docx"}
+TEXT_SUFFIXES = {".txt", ".md"}
+
+_NUMBERED_HEADING = re.compile(r"^(\d+(\.\d+)*|[IVX]+)\.?\s+[A-Z][\w'’&,\- ]+$")
+
+
+def _is_heading(line: str) -> bool:
+    """Heuristic for section titles in report text: short, unpunctuated, upper-case or numbered."""
+    if not 3 <= len(line) <= 80 or line.endswith((".", ",", ";", ":")) or len(line.split()) > 10:
+        return False
+    letters = [c for c in line if c.isalpha()]
+    if len(letters) < len(line) / 2:
+        return False
+    return line.isupper() or bool(_NUMBERED_HEADING.match(line))
+
+
+def split_sections(text: str, section: Optional[str], ignore: frozenset = frozenset()) -> List[Tuple[int, Optional[str], str]]:
+    """
+    Cut text at heading lines.
+    :param text: page or document text
+    :param section: section in effect at the start of `text`
+    :param ignore: heading-like lines that are not sections, e.g. running page headers
+    :return: (offset, section, text) segments in order
+    """
+    segments, start, offset = [], 0, 0
+    for line in text.splitlines(keepends=True):
+        stripped = line.strip()
+        if stripped != section and stripped not in ignore and _is_heading(stripped):
+            if text[start:offset].strip():
+                segments.append((start, section, text[start:offset]))
+            section, start = stripped, offset
+        offset += len(line)
+    if text[start:].strip():
+        segments.append((start, section, text[start:]))
+    return segments
+
+
+def _edge_lines(text: str) -> set:
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    return {lines[0], lines[-1]} if lines else set()
+
+
+def _pdf_layout(path: str) -> Tuple[int, Dict[int, str]]:
+    """Page count and top-level outline titles keyed by their 0-based page index."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    titles = {}
+    try:
+        for item in reader.outline:
+            if isinstance(item, list):  # nested entries: top-level sections are enough
+                continue
+            page = reader.get_destination_page_number(item)
+            if page is not None and page >= 0:
+                titles.setdefault(page, str(item.title).strip())
+    except Exception:
+        titles = {}  # broken outlines are common; fall back to headings in the text
+    return len(reader.pages), titles
+
+
+# the worker's last opened report, so consecutive page ranges skip re-reading the xref
+_READER: Tuple[Optional[tuple], object] = (None, None)
+
+
+def extract_pdf_pages(path: str, start: int, stop: int) -> List[Tuple[int, str]]:
+    """
+    Text of pages [start, stop). Module-level so it can run in a worker process.
+    :return: (0-based page index, text) pairs
+    """
+    global _READER
+    from pypdf import PdfReader
+
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if _READER[0] != key:
+        _READER = (key, PdfReader(path))
+    reader = _READER[1]
+    return [(i, reader.pages[i].extract_text() or "") for i in range(start, min(stop, len(reader.pages)))]
+
+
+class AnnualReportIngestor:
+    """
+    Ingests annual reports (PDF, DOCX, TXT) into the same FAISS index as the news.
+    PDF pages are parsed on a process pool; chunks carry page and section metadata.
+    Pool workers are spawned, so a script using it needs an `if __name__ == "__main__":` guard.
+    """
+
+    def __init__(self, faiss_dir: str = "faiss_index", max_workers: Optional[int] = None,
+                 pages_per_task: Optional[int] = None, ingestor: Optional[NewsIngestor] = None):
+        """
+        :param max_workers: PDF parsing processes; defaults to the `annual_report` config block, then the CPU count
+        :param pages_per_task: pages parsed per pool task
+        :param ingestor: indexing path to feed; a NewsIngestor on `faiss_dir` by default
+        """
+        try:
+            self.log = CustomLogger().get_logger(__name__)
+            self.ingestor = ingestor or NewsIngestor(faiss_dir=faiss_dir)
+            report_config = self.ingestor.model_loader.config.get("annual_report") or {}
+            self.max_workers = max_workers or report_config.get("max_workers") or os.cpu_count() or 1
+            self.pages_per_task = pages_per_task or report_config.get("pages_per_task", 8)
+            self.last_ingest_report = None
+        except Exception as e:
+            self.log.error("Failed to initialize AnnualReportIngestor", error=str(e))
+            raise CustomException("Failed to initialize AnnualReportIngestor", sys)
+
+    def ingest(self, paths: Iterable, append: bool = True):
+        """
+        Parse, chunk, embed and index the given reports.
+        :param paths: report files; the type is picked from the suffix
+        :param append: add only unseen chunks to the saved index; False rebuilds it from these files
+        :return: retriever over the updated index
+        """
+        report = {"files": 0, "pages": 0, "failed": [], "partial": []}
+        retriever = self.ingestor.ingest_documents(self.iter_documents(paths, report), append=append, report=report)
+        self.last_ingest_report = report
+        if report["failed"] or report["partial"]:
+            self.log.warning("Some reports were not ingested", failed=len(report["failed"]),
+                             partial=len(report["partial"]), files=report["files"])
+        return retriever
+
+    def iter_documents(self, paths: Iterable, report: Optional[dict] = None) -> Iterator[Document]:
+        """
+        Lazily yield section-sized documents for each report, in file and page order.
+        Unreadable files are logged and added to `report["failed"]`; a file that breaks off after
+        some of its sections were yielded goes to `report["partial"]` with the pages and sections yielded.
+        """
+        report = report if report is not None else {"files": 0, "pages": 0, "failed": [], "partial": []}
+        text_files = []
+        self._pool = None
+        try:
+            for path in paths:
+                path = Path(path)
+                suffix = path.suffix.lower()
+                if suffix in TEXT_SUFFIXES:
+                    text_files.append(path)  # streamed by the news path below
+                    continue
+                report["files"] += 1
+                pages_before, sections = report["pages"], 0
+                try:
+                    if suffix in PDF_SUFFIXES:
+                        documents = self._iter_pdf(path, report)
+                    elif suffix in DOCX_SUFFIXES:
+                        documents = self._iter_docx(path)
+                    else:
+                        raise ValueError(f"Unsupported file type: {suffix or 'none'}")
+                    for document in documents:
+                        sections += 1
+                        yield document
+                except Exception as e:
+                    self.log.error("Failed to read report", filename=str(path), error=str(e))
+                    if sections:
+                        # the sections before the failure are already on their way into the index
+                        report.setdefault("partial", []).append({
+                            "file": str(path), "error": str(e),
+                            "indexed_pages": report["pages"] - pages_before, "indexed_sections": sections,
+                        })
+                    else:
+                        report["failed"].append({"file": str(path), "error": str(e)})
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+        if text_files:
+            for doc in self.ingestor.iter_text_files(text_files, report):
+                doc.metadata["doc_type"] = "annual_report"
+                yield doc
+
+    def _iter_pdf(self, path: Path, report: dict) -> Iterator[Document]:
+        page_count, outline = _pdf_layout(str(path))
+        ranges = [(start, start + self.pages_per_task) for start in range(0, page_count, self.pages_per_task)]
+
+        def pages():
+            if self.max_workers == 1 or len(ranges) == 1:
+                for start, stop in ranges:
+                    yield from extract_pdf_pages(str(path), start, stop)
+                return
+            if self._pool is None:  # started on the first multi-range PDF, reused for the rest
+                # spawn, not fork: forking while the logging queue listener thread runs can deadlock the child
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=mp.get_context("spawn"))
+            pool = self._pool
+            # parse ahead on the pool but keep only a few ranges in memory, consumed in page order
+            pending, upcoming = deque(), iter(ranges)
+            for start, stop in upcoming:
+                pending.append(pool.submit(extract_pdf_pages, str(path), start, stop))
+                if len(pending) >= self.max_workers * 2:
+                    break
+            while pending:
+                page_texts = pending.popleft().result()
+                for start, stop in upcoming:
+                    pending.append(pool.submit(extract_pdf_pages, str(path), start, stop))
+                    break
+                yield from page_texts
+
+        # first/last lines shared with a neighbouring page are running headers or footers, not sections
+        page_iter = pages()
+        current, previous_edges = next(page_iter, None), set()
+        section, offset = None, 0
+        while current is not None:
+            following = next(page_iter, None)
+            index, text = current
+            edges = _edge_lines(text)
+            if index in outline:
+                section = outline[index]
+            text = text.rstrip() + "\n\n"
+            if outline:
+                segments = [(0, section, text)]
+            else:
+                running = edges & (previous_edges | (_edge_lines(following[1]) if following else set()))
+                segments = split_sections(text, section, frozenset(running))
+            for segment_start, segment_section, segment_text in segments:
+                section = segment_section
+                yield Document(page_content=segment_text, metadata={
+                    "source": str(path), "page": index + 1, "section": section,
+                    "doc_type": "annual_report", "block_start": offset + segment_start,
+                })
+            report["pages"] += 1  # counted once all of its sections are out
+            offset += len(text)
+            current, previous_edges = following, edges
+        self.log.info("PDF parsed", filename=str(path), pages=page_count, outline_sections=len(outline))
+
+    def _iter_docx(self, path: Path) -> Iterator[Document]:
+        from langchain_community.document_loaders import Docx2txtLoader
+
+        for doc in Docx2txtLoader(str(path)).load():
+            for segment_start, section, segment_text in split_sections(doc.page_content, None):
+                yield Document(page_content=segment_text, metadata={
+                    "source": str(path), "section": section,
+                    "doc_type": "annual_report", "block_start": segment_start,
+                })
+        self.log.info("DOCX parsed", filename=str(path))
+
+
+if __name__ == "__main__":
+    retriever = AnnualReportIngestor().ingest(sys.argv[1:])
+    print(retriever.invoke("What are the key risks?"))
@@ -0,0 +1,197 @@
+## Single-pass article extraction: selectolax or lxml when installed, html.parser otherwise.
+## Boilerplate is pruned first, then h1/li/p are visited once in document order.
+from html.parser import HTMLParser
+from typing import Dict, Optional
+
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as _SelectolaxParser
+except ImportError:  # optional fast backend
+    _SelectolaxParser = None
+
+try:
+    import lxml.html as _lxml_html
+    from lxml import etree as _lxml_etree
+except ImportError:  # optional fast backend
+    _lxml_html = None
+    _lxml_etree = None
+
+BOILERPLATE_TAGS = ("script", "style", "noscript", "nav", "footer", "aside", "form", "iframe", "svg", "template")
+
+
+class _ArticleBuilder:
+    """Accumulates one pass of (tag, raw text, stripped text) into the parse_article dict."""
+
+    def __init__(self):
+        self.headline = None
+        self.key_points = []
+        self.paragraphs = []
+
+    def add(self, tag: str, raw: str, stripped: str) -> None:
+        if tag == "p":
+            # an HTML5 tree turns a stray </p> (e.g. after <p>x<div>y</div>z</p>) into an empty <p>;
+            # empty paragraphs carry nothing, so every backend drops them
+            if stripped:
+                self.paragraphs.append(stripped)
+        elif tag == "li":
+            if "key points" in raw.lower() or raw.startswith("*"):
+                self.key_points.append(stripped)
+        elif tag == "h1" and self.headline is None:
+            self.headline = stripped
+
+    def result(self) -> Dict[str, object]:
+        return {
+            "headline": self.headline or "",
+            "key_points": self.key_points,
+            "paragraphs": self.paragraphs,
+        }
+
+
+def _extract_selectolax(html: str) -> Dict[str, object]:
+    tree = _SelectolaxParser(html)
+    tree.strip_tags(list(BOILERPLATE_TAGS))
+    builder = _ArticleBuilder()
+    for node in tree.css("h1, li, p"):
+        raw = node.text(deep=True)
+        builder.add(node.tag, raw, node.text(deep=True, strip=True))
+    return builder.result()
+
+
+def _extract_lxml(html: str) -> Dict[str, object]:
+    root = _lxml_html.document_fromstring(html)
+    _lxml_etree.strip_elements(root, *BOILERPLATE_TAGS, with_tail=False)
+    builder = _ArticleBuilder()
+    for element in root.iter("h1", "li", "p"):
+        pieces = list(element.itertext())
+        builder.add(element.tag, "".join(pieces), "".join(piece.strip() for piece in pieces))
+    return builder.result()
+
+
+class _StreamingExtractor(HTMLParser):
+    """
+    html.parser fallback that never builds a tree: text is buffered only while an
+    h1/li/p is open and ignored entirely inside boilerplate elements. Elements are
+    reported in start-tag order, like the tree backends, and a list item's text
+    includes the items of lists nested in it.
+    """
+
+    _CAPTURE = ("h1", "li", "p")
+    # opening one of these implicitly closes an open <p>
+    _CLOSES_P = {"p", "div", "ul", "ol", "li", "h1", "h2", "h3", "h4", "h5", "h6", "table", "section", "article",
+                 "header", "blockquote", "pre", "figure", "hr"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.builder = _ArticleBuilder()
+        self._open = []  # [tag, text pieces, start order, list depth] for every capturing element currently open
+        self._done = []  # (start order, tag, text pieces) of closed elements
+        self._started = 0
+        self._list_depth = 0
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in BOILERPLATE_TAGS:
+            self._skip_depth += 1
+            return
+        if self._skip_depth:
+            return
+        if tag in self._CLOSES_P and self._open and self._open[-1][0] == "p":
+            self._close("p")
+        # a new item closes an open sibling, not the item a nested list sits in
+        if tag == "li" and self._open and self._open[-1][0] == "li" and self._open[-1][3] == self._list_depth:
+            self._close("li")
+        if tag in ("ul", "ol"):
+            self._list_depth += 1
+        if tag in self._CAPTURE:
+            self._open.append([tag, [], self._started, self._list_depth])
+            self._started += 1
+
+    def handle_endtag(self, tag):
+        if tag in BOILERPLATE_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if self._skip_depth:
+            return
+        if tag in self._CAPTURE:
+            self._close(tag)
+        elif tag in ("ul", "ol"):
+            while any(frame[0] == "li" and frame[3] == self._list_depth for frame in self._open):
+                self._close("li")
+            self._list_depth = max(0, self._list_depth - 1)
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            for frame in self._open:
+                frame[1].append(data)
+
+    def _close(self, tag):
+        if not any(frame[0] == tag for frame in self._open):
+            return
+        while self._open:
+            frame_tag, pieces, started, _ = self._open.pop()
+            self._done.append((started, frame_tag, pieces))
+            if frame_tag == tag:
+                break
+
+    def close(self):
+        super().close()
+        while self._open:
+            frame_tag, pieces, started, _ = self._open.pop()
+            self._done.append((started, frame_tag, pieces))
+        # nested elements close before their parents; report them in document order
+        for _, tag, pieces in sorted(self._done, key=lambda done: done[0]):
+            self.builder.add(tag, "".join(pieces), "".join(piece.strip() for piece in pieces))
+        self._done = []
+
+
+def _extract_streaming(html: str) -> Dict[str, object]:
+    parser = _StreamingExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser.builder.result()
+
+
+def _extract_soup(soup: BeautifulSoup) -> Dict[str, object]:
+    for tag in soup.find_all(BOILERPLATE_TAGS):
+        tag.decompose()
+    builder = _ArticleBuilder()
+    for tag in soup.find_all(["h1", "li", "p"]):
+        builder.add(tag.name, tag.get_text(), tag.get_text(strip=True))
+    return builder.result()
+
+
+def available_backends() -> list:
+    """Names of the backends usable in this environment, fastest first."""
+    backends = []
+    if _SelectolaxParser is not None:
+        backends.append("selectolax")
+    if _lxml_html is not None:
+        backends.append("lxml")
+    backends.append("html.parser")
+    return backends
+
+
+def extract_article(html: str, backend: Optional[str] = None) -> Dict[str, object]:
+    """
+    Extract headline, key points and paragraphs from raw article HTML.
+
+    :param html: Page HTML.
+    :param backend: Force 'selectolax', 'lxml' or 'html.parser'; defaults to the fastest available.
+    :return: Dictionary with 'headline', 'key_points', and 'paragraphs'.
+    """
+    backend = backend or available_backends()[0]
+    if not html.strip():
+        return {"headline": "", "key_points": [], "paragraphs": []}
+    if backend == "selectolax":
+        return _extract_selectolax(html)
+    if backend == "lxml":
+        return _extract_lxml(html)
+    if backend == "html.parser":
+        return _extract_streaming(html)
+    raise ValueError(f"Unknown extraction backend: {backend}")
+
+
+def extract_article_from_soup(soup: BeautifulSoup) -> Dict[str, object]:
+    """Same extraction for callers that already hold a BeautifulSoup tree (the tree is pruned in place)."""
+    return _extract_soup(soup)
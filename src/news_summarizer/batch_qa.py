@@ -0,0 +1,220 @@
+import sys
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from log_utils.custom_logging import CustomLogger
+from exception.custom_exeption import CustomException, root_cause
+from utils.model_loader import ModelLoader
+from src.news_summarizer.chat_module import ConversationalRAG
+from src.news_summarizer.semantic_cache import SemanticAnswerCache
+from src.news_summarizer.rag_tracing import RAGTurnTracer
+
+BatchItem = Tuple[str, str]  # (session_id, question)
+
+
+def watchlist_items(tickers: Sequence[str], questions: Sequence[str], session_prefix: str = "batch") -> List[BatchItem]:
+    """
+    Every question for every ticker, one chat session per ticker: 'TSLA' -> session 'batch-TSLA'.
+    The questions are independent, so leave `ordered_sessions` off to run a ticker's questions in parallel.
+    """
+    return [(f"{session_prefix}-{ticker}", question) for ticker in tickers for question in questions]
+
+
+def _error_message(error: Exception) -> str:
+    # CustomException wraps the real failure; report that instead of the wrapper's traceback dump
+    cause = root_cause(error)
+    return f"{type(cause).__name__}: {cause}"
+
+
+class BatchQuestionAnswerer:
+    """
+    Answers many (session_id, question) pairs concurrently, at most `max_concurrency`
+    turns in flight. Items are independent by default, so the questions of one session
+    run in parallel too. With `ordered_sessions` they run in order instead, so follow-ups
+    see the earlier answers in their history, and only different sessions run in parallel. An item that fails is reported with its error and does not stop
+    the rest of the batch.
+
+    Each result is a dict: index (position in the input), session_id, question,
+    answer (None on failure), error (None on success), seconds and trace
+    (the turn's RAGTurnTracer trace).
+    """
+
+    def __init__(self, retriever=None, retriever_for: Optional[Callable[[str], object]] = None,
+                 semantic_cache: Optional[SemanticAnswerCache] = None, llm=None,
+                 max_concurrency: Optional[int] = None, ordered_sessions: Optional[bool] = None):
+        """
+        :param retriever: retriever shared by every session
+        :param retriever_for: session_id -> retriever, e.g. one shard per ticker; overrides `retriever`
+        :param semantic_cache: passed to every session's ConversationalRAG
+        :param llm: chat model shared by every session; the configured one when None
+        :param max_concurrency: turns in flight; `batch_qa.max_concurrency` from config when None
+        :param ordered_sessions: run one session's questions in order; `batch_qa.ordered_sessions` when None
+        """
+        self.log = CustomLogger().get_logger(__name__)
+        try:
+            if retriever is None and retriever_for is None:
+                raise ValueError("Either retriever or retriever_for is required")
+            self.retriever = retriever
+            self.retriever_for = retriever_for
+            self.semantic_cache = semantic_cache
+
+            self.model_loader = ModelLoader()
+            batch_config = self.model_loader.config.get("batch_qa") or {}
+            self.max_concurrency = max(1, max_concurrency or batch_config.get("max_concurrency", 8))
+            self.ordered_sessions = batch_config.get("ordered_sessions", False) if ordered_sessions is None else ordered_sessions
+            # one client for the whole batch instead of one per session
+            self.llm = llm if llm is not None else self.model_loader.load_llm("google")
+
+            self._sessions: Dict[str, ConversationalRAG] = {}
+            self._sessions_lock = threading.Lock()
+        except Exception as e:
+            self.log.error("Failed to initialize BatchQuestionAnswerer", error=str(e))
+            raise CustomException("Failed to initialize BatchQuestionAnswerer", sys)
+
+    def _rag(self, session_id: str) -> ConversationalRAG:
+        with self._sessions_lock:
+            rag = self._sessions.get(session_id)
+            if rag is None:
+                retriever = self.retriever_for(session_id) if self.retriever_for is not None else self.retriever
+                rag = ConversationalRAG(session_id, retriever, semantic_cache=self.semantic_cache, llm=self.llm)
+                self._sessions[session_id] = rag
+            return rag
+
+    def _lanes(self, items: Sequence[BatchItem]) -> List[deque]:
+        """Work queues run one item at a time: one per session when ordered, else one per item."""
+        indexed = [(index, session_id, question) for index, (session_id, question) in enumerate(items)]
+        if not self.ordered_sessions:
+            return [deque([item]) for item in indexed]
+        lanes: Dict[str, deque] = {}
+        for item in indexed:
+            lanes.setdefault(item[1], deque()).append(item)
+        return list(lanes.values())
+
+    @staticmethod
+    def _result(index: int, session_id: str, question: str, started: float, answer: Optional[str] = None,
+                error: Optional[str] = None, trace: Optional[dict] = None) -> dict:
+        return {"index": index, "session_id": session_id, "question": question, "answer": answer,
+                "error": error, "seconds": round(time.perf_counter() - started, 3), "trace": trace}
+
+    # each item gets its own tracer: with unordered sessions, turns of one session overlap
+    # and the RAG's last_trace may already belong to another item
+    def _answer(self, index: int, session_id: str, question: str) -> dict:
+        started = time.perf_counter()
+        tracer = RAGTurnTracer(session_id)
+        try:
+            answer = self._rag(session_id).invoke(question, tracer=tracer)
+            return self._result(index, session_id, question, started, answer=answer, trace=tracer.finish())
+        except Exception as e:
+            self.log.warning("Batch item failed", session_id=session_id, index=index, error=_error_message(e))
+            return self._result(index, session_id, question, started, error=_error_message(e),
+                                trace=tracer.finish(error=e))
+
+    async def _aanswer(self, index: int, session_id: str, question: str) -> dict:
+        started = time.perf_counter()
+        tracer = RAGTurnTracer(session_id)
+        try:
+            answer = await self._rag(session_id).ainvoke(question, tracer=tracer)
+            return self._result(index, session_id, question, started, answer=answer, trace=tracer.finish())
+        except Exception as e:
+            self.log.warning("Batch item failed", session_id=session_id, index=index, error=_error_message(e))
+            return self._result(index, session_id, question, started, error=_error_message(e),
+                                trace=tracer.finish(error=e))
+
+    def _log_done(self, total: int, failed: int, started: float) -> None:
+        self.log.info("Batch completed", items=total, failed=failed, max_concurrency=self.max_concurrency,
+                      ordered_sessions=self.ordered_sessions, seconds=round(time.perf_counter() - started, 3))
+
+    def iter_batch(self, items: Sequence[BatchItem]) -> Iterator[dict]:
+        """
+        Answer the items on a thread pool, yielding each result as soon as it completes.
+        :param items: (session_id, question) pairs
+        :return: iterator of result dicts, in completion order
+        """
+        lanes = self._lanes(items)
+        started, failed = time.perf_counter(), 0
+        if not lanes:
+            return
+        pending = {}
+        ready = deque(lanes)
+        pool = ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(lanes)))
+
+        def submit_ready() -> None:
+            while ready and len(pending) < self.max_concurrency:
+                lane = ready.popleft()
+                pending[pool.submit(self._answer, *lane.popleft())] = lane
+
+        try:
+            submit_ready()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    lane = pending.pop(future)
+                    if lane:
+                        ready.append(lane)  # back of the line: sessions take turns
+                    result = future.result()
+                    failed += result["error"] is not None
+                    yield result
+                submit_ready()
+            self._log_done(len(items), failed, started)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def batch(self, items: Sequence[BatchItem]) -> List[dict]:
+        """
+        Answer all items concurrently.
+        :param items: (session_id, question) pairs
+        :return: result dicts in input order
+        """
+        return sorted(self.iter_batch(items), key=lambda result: result["index"])
+
+    async def aiter_batch(self, items: Sequence[BatchItem]) -> AsyncIterator[dict]:
+        """
+        Async version of `iter_batch`: one task per lane, `max_concurrency` turns awaited at once.
+        :param items: (session_id, question) pairs
+        :return: async iterator of result dicts, in completion order
+        """
+        lanes = self._lanes(items)
+        started, failed = time.perf_counter(), 0
+        slots = asyncio.Semaphore(self.max_concurrency)
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def run_lane(lane: deque) -> None:
+            for item in lane:
+                async with slots:
+                    result = await self._aanswer(*item)
+                await results.put(result)
+
+        tasks = [asyncio.create_task(run_lane(lane)) for lane in lanes]
+        try:
+            for _ in range(len(items)):
+                result = await results.get()
+                failed += result["error"] is not None
+                yield result
+            self._log_done(len(items), failed, started)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def abatch(self, items: Sequence[BatchItem]) -> List[dict]:
+        """
+        Async version of `batch`.
+        :param items: (session_id, question) pairs
+        :return: result dicts in input order
+        """
+        results = [result async for result in self.aiter_batch(items)]
+        return sorted(results, key=lambda result: result["index"])
+
+
+def answer_batch(items: Sequence[BatchItem], retriever, max_concurrency: Optional[int] = None, **kwargs) -> List[dict]:
+    """One-shot `BatchQuestionAnswerer(retriever, ...).batch(items)`."""
+    return BatchQuestionAnswerer(retriever, max_concurrency=max_concurrency, **kwargs).batch(items)
+
+
+async def aanswer_batch(items: Sequence[BatchItem], retriever, max_concurrency: Optional[int] = None, **kwargs) -> List[dict]:
+    """One-shot `BatchQuestionAnswerer(retriever, ...).abatch(items)`."""
+    return await BatchQuestionAnswerer(retriever, max_concurrency=max_concurrency, **kwargs).abatch(items)
@@ -1,43 +1,161 @@
 ## Building the chat module
+import re
+import asyncio
 import sys
-import streamlit as st
+import hashlib
+import threading
 from operator import itemgetter
-from typing import List, Optional
+from typing import AsyncIterator, Iterator, List, Optional
 
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
 from langchain_core.chat_history import BaseChatMessageHistory
-from langchain_community.chat_message_histories import ChatMessageHistory
+from langchain_core.documents import Document
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.messages import BaseMessage
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableConfig, RunnableLambda, RunnablePassthrough
 from langchain_core.runnables.history import RunnableWithMessageHistory
-from langchain.chains import create_history_aware_retriever, create_retrieval_chain
-from langchain.chains.combine_documents import create_stuff_documents_chain
+from langchain_core.vectorstores import VectorStoreRetriever
 from utils.model_loader import ModelLoader
-from prompts.prompt_library import document_summarize_prompt,qa_history_prompt,qa_context_history_prompt
+from prompts.prompt_library import qa_history_prompt,qa_context_history_prompt
 from exception.custom_exeption import CustomException
 from log_utils.custom_logging import CustomLogger
+from utils.lru_cache import LRUCache
+from src.news_summarizer.semantic_cache import SemanticAnswerCache
+from src.news_summarizer.history_store import SessionHistoryStore, history_summarizer, window_messages
+from src.news_summarizer.context_packer import ContextPacker
+from src.news_summarizer.rag_tracing import RAGTurnTracer, trace_cache
+
+# Process-wide bounded history store, built from the `chat_history` config block on first use
+_HISTORY_STORE: Optional[SessionHistoryStore] = None
+_HISTORY_STORE_LOCK = threading.Lock()
+
+
+def configure_history_store(summary_llm=None, config_path: Optional[str] = None) -> SessionHistoryStore:
+    """
+    (Re)build the process-wide history store from the `chat_history` config block.
+    :param summary_llm: chat model that writes the running summary when `summarize` is on;
+        the `chat_history.summary_llm` model from config when None
+    :param config_path: config file to read instead of the default one
+    """
+    global _HISTORY_STORE
+    model_loader = ModelLoader(config_path)
+    history_config = model_loader.config.get("chat_history") or {}
+    summarizer = None
+    if history_config.get("summarize"):
+        if summary_llm is None:
+            summary_llm = model_loader.load_llm(history_config.get("summary_llm", "google"))
+        summarizer = history_summarizer(summary_llm)
+    with _HISTORY_STORE_LOCK:
+        _HISTORY_STORE = SessionHistoryStore.from_config(history_config, summarizer=summarizer)
+        return _HISTORY_STORE
+
+
+def _ensure_history_store() -> SessionHistoryStore:
+    with _HISTORY_STORE_LOCK:
+        if _HISTORY_STORE is not None:
+            return _HISTORY_STORE
+    return configure_history_store()
 
-# In-memory history store
-_HISTORY_STORE = {}
 
 def get_session_history(session_id: str) -> BaseChatMessageHistory:
     """Retrieve or create a chat history for a session."""
-    if session_id not in _HISTORY_STORE:
-        _HISTORY_STORE[session_id] = ChatMessageHistory()
-    return _HISTORY_STORE[session_id]
+    return _ensure_history_store().get(session_id)
+
+
+# (history digest, input) -> standalone question, shared by all sessions
+_REWRITE_CACHE = LRUCache(maxsize=1024)
+
+# words that usually point back at an earlier turn
+_ANAPHORA = {
+    "it", "its", "they", "them", "their", "theirs", "this", "that", "these", "those",
+    "he", "she", "him", "her", "his", "there", "then", "above", "previous", "earlier",
+    "same", "former", "latter", "also", "else", "more", "further", "again",
+}
+# "the company", "the stock", "the CEO": a definite phrase naming something from an earlier turn
+_DEFINITE = re.compile(r"\b[Tt]he\s+(?:[a-z]|[A-Z]{2,5}\b)")
+# $TSLA, NVDA, BRK.B
+_TICKER = re.compile(r"^\$[A-Za-z.]+$|^[A-Z]{2,5}(\.[A-Z])?$")
+# all-caps words that are not tickers; only a $-prefixed form names one of these symbols
+_NOT_TICKERS = {
+    "AI", "API", "AUM", "CAGR", "CEO", "CFO", "CIO", "COO", "CPI", "CTO", "EPS", "ESG", "ETF", "EU",
+    "EV", "EBIT", "FCF", "FDA", "FED", "FOMC", "FTC", "FX", "FY", "GAAP", "GDP", "HQ", "IPO", "IRR",
+    "NAV", "OK", "PE", "PMI", "QOQ", "R&D", "ROA", "ROE", "ROI", "SEC", "UK", "US", "USA", "USD",
+    "YOY", "YTD",
+}
+
+
+
+def _embed_query(embeddings, question: str, config: RunnableConfig) -> List[float]:
+    lookup = getattr(embeddings, "embed_query_cached", None)  # CachedEmbeddings
+    if lookup is None:
+        return embeddings.embed_query(question)
+    vector, hit = lookup(question)
+    trace_cache(config, "query_embedding", "hit" if hit else "miss")
+    return vector
+
+
+class _TurnHistory(RunnableWithMessageHistory):
+    """Writes a turn to session history only when it produced an answer; a stream closed early has none."""
+
+    @staticmethod
+    def _answered(run) -> bool:
+        outputs = run.outputs
+        return (outputs.get("output") if isinstance(outputs, dict) else outputs) is not None
+
+    def _exit_history(self, run, config: RunnableConfig) -> None:
+        if self._answered(run):
+            super()._exit_history(run, config)
+
+    async def _aexit_history(self, run, config: RunnableConfig) -> None:
+        if self._answered(run):
+            await super()._aexit_history(run, config)
+
+
+class _TracedVectorStoreRetriever(VectorStoreRetriever):
+    """Similarity retriever that embeds the query in a child `embed_query` run, then searches by vector."""
+
+    def _embed_step(self, run_manager):
+        embeddings = self.vectorstore.embeddings
+        step = RunnableLambda(lambda question, config: _embed_query(embeddings, question, config))
+        return step.with_config(run_name="embed_query"), {"callbacks": run_manager.get_child()}
 
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        step, config = self._embed_step(run_manager)
+        return self.vectorstore.similarity_search_by_vector(step.invoke(query, config), **self.search_kwargs)
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        step, config = self._embed_step(run_manager)
+        vector = await step.ainvoke(query, config)
+        return await self.vectorstore.asimilarity_search_by_vector(vector, **self.search_kwargs)
 
 
 class ConversationalRAG:
-    def __init__(self, session_id: str, retriever):
+    def __init__(self, session_id: str, retriever, semantic_cache: Optional[SemanticAnswerCache] = None, llm=None):
+        """
+        :param session_id: chat history key
+        :param retriever: retriever over the news index
+        :param semantic_cache: opt-in cache that answers near-identical questions without retrieval or generation
+        :param llm: chat model to use instead of the configured one
+        """
         self.log = CustomLogger().get_logger(__name__)
         self.session_id = session_id
         self.retriever = retriever
-        self.llm = self._load_llm()
+        self.semantic_cache = semantic_cache
+        self.last_trace: Optional[dict] = None  # stage timings, tokens and cache events of the latest turn
+        self.model_loader = ModelLoader()
+        self.llm = llm if llm is not None else self._load_llm()
         try:
             self.contextualize_prompt = qa_history_prompt
             self.qa_prompt= qa_context_history_prompt
 
+            retriever_config = self.model_loader.config.get("retriever") or {}
+            self.context_packer = ContextPacker.from_config(retriever_config.get("context"))
+
+            history_config = self.model_loader.config.get("chat_history") or {}
+            self.max_history_tokens = history_config.get("max_prompt_tokens", 2000)
+            _ensure_history_store()
+
             self._build_lcel_chain()
             self.log.info("Conversational RAG initialized", session_id= self.session_id)
 
@@ -48,38 +166,126 @@ class ConversationalRAG:
 
     def _load_llm(self):
         try:
-            llm= ModelLoader().load_llm("google")
+            llm= self.model_loader.load_llm("google")
             self.log.info("Loaded LLM successfully", class_name= llm.__class__.__name__)
             return llm
         except Exception as e:
             self.log.error("error loading llm", error=str(e))
             raise CustomException("Error loading llm", sys)
 
-    def invoke(self, user_input: str)->str:
+    def invoke(self, user_input: str, tracer: Optional[RAGTurnTracer] = None)->str:
         """
                package of chain
                :param user_input:
+               :param tracer: records this turn's trace, for callers running turns concurrently
+                   that cannot rely on `last_trace`; a new one when None
                :return:
                """
+        tracer = tracer or RAGTurnTracer(self.session_id)
         try:
 
-            answer = self.chain.invoke(
-                           {"input": user_input},
-                           config={"configurable": {"session_id": self.session_id}}
-                       )
+            answer = self.chain.invoke({"input": user_input}, config=self._turn_config(tracer))
+            self.last_trace = tracer.finish()
             if not answer:
                 self.log.warning("No answer has been generated", session_id=self.session_id)
                 return "No answer generated"
 
             self.log.info("Chain invoke successfully",
                           session_id=self.session_id,
-                          user_input=user_input,
-                          answer_preview=answer[:100])
+                          input_chars=len(user_input),
+                          answer_chars=len(answer))
             return answer
 
         except Exception as e:
+            self.last_trace = tracer.finish(error=e)
             self.log.error("Failed to invoke conversational RAG", error=str(e))
             raise CustomException("Failed to invoke conversational RAG", sys)
+
+    async def ainvoke(self, user_input: str, tracer: Optional[RAGTurnTracer] = None) -> str:
+        """
+        Async version of `invoke`.
+        :param user_input:
+        :param tracer: records this turn's trace; a new one when None
+        :return: answer text
+        """
+        tracer = tracer or RAGTurnTracer(self.session_id)
+        try:
+            answer = await self.chain.ainvoke({"input": user_input}, config=self._turn_config(tracer))
+            self.last_trace = tracer.finish()
+            if not answer:
+                self.log.warning("No answer has been generated", session_id=self.session_id)
+                return "No answer generated"
+
+            self.log.info("Chain ainvoke successfully",
+                          session_id=self.session_id,
+                          input_chars=len(user_input),
+                          answer_chars=len(answer))
+            return answer
+
+        except Exception as e:
+            self.last_trace = tracer.finish(error=e)
+            self.log.error("Failed to ainvoke conversational RAG", error=str(e))
+            raise CustomException("Failed to ainvoke conversational RAG", sys)
+
+    def stream(self, user_input: str) -> Iterator[str]:
+        """
+        Yield answer tokens as the LLM produces them.
+        The turn is written to session history once the stream is fully consumed; a stream
+        closed early is traced as cancelled and leaves the history untouched.
+        :param user_input:
+        :return: iterator of answer chunks
+        """
+        tracer = RAGTurnTracer(self.session_id)
+        chunks = self.chain.stream({"input": user_input}, config=self._turn_config(tracer))
+        try:
+            answer_chars = 0
+            for chunk in chunks:
+                if chunk:
+                    answer_chars += len(chunk)
+                    yield chunk
+
+            self.log.info("Chain stream completed", session_id=self.session_id, answer_chars=answer_chars)
+
+        except GeneratorExit:
+            chunks.close()
+            self.last_trace = tracer.finish(cancelled=True)
+            self.log.info("Chain stream abandoned", session_id=self.session_id, answer_chars=answer_chars)
+            raise
+        except Exception as e:
+            self.last_trace = tracer.finish(error=e)
+            self.log.error("Failed to stream conversational RAG", error=str(e))
+            raise CustomException("Failed to stream conversational RAG", sys)
+        finally:
+            self.last_trace = tracer.finish()  # no-op if already finished; closes abandoned streams
+
+    async def astream(self, user_input: str) -> AsyncIterator[str]:
+        """
+        Async version of `stream`.
+        :param user_input:
+        :return: async iterator of answer chunks
+        """
+        tracer = RAGTurnTracer(self.session_id)
+        chunks = self.chain.astream({"input": user_input}, config=self._turn_config(tracer))
+        try:
+            answer_chars = 0
+            async for chunk in chunks:
+                if chunk:
+                    answer_chars += len(chunk)
+                    yield chunk
+
+            self.log.info("Chain astream completed", session_id=self.session_id, answer_chars=answer_chars)
+
+        except (GeneratorExit, asyncio.CancelledError):
+            await chunks.aclose()
+            self.last_trace = tracer.finish(cancelled=True)
+            self.log.info("Chain astream abandoned", session_id=self.session_id, answer_chars=answer_chars)
+            raise
+        except Exception as e:
+            self.last_trace = tracer.finish(error=e)
+            self.log.error("Failed to stream conversational RAG", error=str(e))
+            raise CustomException("Failed to stream conversational RAG", sys)
+        finally:
+            self.last_trace = tracer.finish()
     #
     #
     # def _get_session_history(self, session_id) -> BaseChatMessageHistory:
@@ -98,37 +304,145 @@ class ConversationalRAG:
     #         self.log.error("Failed to access session history", error=str(e))
     #         raise CustomException("Failed to access session history", sys)
 
+    def _turn_config(self, tracer: RAGTurnTracer) -> RunnableConfig:
+        return {"configurable": {"session_id": self.session_id}, "callbacks": [tracer]}
+
+    def _window_history(self, inputs: dict) -> List[BaseMessage]:
+        """Most recent turns that fit the prompt token budget."""
+        return window_messages(inputs["chat_history"], self.max_history_tokens)
+
+    @staticmethod
+    def _names_entity(question: str) -> bool:
+        """
+        A ticker, or a capitalized word that does not start a sentence (a company or person).
+        Common acronyms (CEO, EPS, IPO) name no company unless written with a `$`.
+        """
+        for sentence in re.split(r"[.?!]\s+", question.strip()):
+            tokens = re.findall(r"\$?[A-Za-z][\w.&'-]*", sentence)
+            for position, token in enumerate(tokens):
+                token = token.rstrip(".")
+                if (_TICKER.match(token) and token not in _NOT_TICKERS) or (position > 0 and token[0].isupper() and any(c.islower() for c in token)):
+                    return True
+        return False
+
+    @classmethod
+    def _is_self_contained(cls, question: str) -> bool:
+        """
+        Cheap local check: names what it asks about and has no word or "the <noun>" phrase
+        that refers back to earlier turns. Anything doubtful goes to the rewriter.
+        """
+        words = re.findall(r"[a-z']+", question.lower())
+        return (cls._names_entity(question)
+                and not any(w in _ANAPHORA for w in words)
+                and not _DEFINITE.search(question))
+
+    @staticmethod
+    def _rewrite_key(inputs: dict) -> tuple:
+        digest = hashlib.sha256()
+        for message in inputs["chat_history"]:
+            digest.update(f"{message.type}:{message.content}\n".encode("utf-8"))
+        return digest.hexdigest(), inputs["input"]
+
+    def _rewrite_fast_path(self, inputs: dict, config: Optional[RunnableConfig] = None) -> Optional[str]:
+        """Return the question to retrieve with when no LLM call is needed, else None."""
+        if not inputs["chat_history"]:
+            self.log.info("Question rewrite skipped", session_id=self.session_id, reason="empty_history")
+            trace_cache(config, "question_rewrite", "skipped_empty_history")
+            return inputs["input"]
+        if self._is_self_contained(inputs["input"]):
+            self.log.info("Question rewrite skipped", session_id=self.session_id, reason="self_contained")
+            trace_cache(config, "question_rewrite", "skipped_self_contained")
+            return inputs["input"]
+        cached = _REWRITE_CACHE.get(self._rewrite_key(inputs))
+        if cached is not None:
+            self.log.info("Question rewrite skipped", session_id=self.session_id, reason="cache_hit")
+        trace_cache(config, "question_rewrite", "hit" if cached is not None else "miss")
+        return cached
+
+    def _rewrite_question(self, inputs: dict, config: RunnableConfig) -> str:
+        question = self._rewrite_fast_path(inputs, config)
+        if question is None:
+            question = self.question_rewriter.invoke(inputs, config)
+            _REWRITE_CACHE.put(self._rewrite_key(inputs), question)
+        return question
+
+    async def _arewrite_question(self, inputs: dict, config: RunnableConfig) -> str:
+        question = self._rewrite_fast_path(inputs, config)
+        if question is None:
+            question = await self.question_rewriter.ainvoke(inputs, config)
+            _REWRITE_CACHE.put(self._rewrite_key(inputs), question)
+        return question
+
+    def _answer_or_cached(self, inputs: dict, config: RunnableConfig):
+        """Return a cached answer for the standalone question, or the answer chain primed to cache its output."""
+        answer, cache_key = self.semantic_cache.lookup(inputs["question"], self.retriever)
+        trace_cache(config, "semantic_answer", "hit" if answer is not None else "miss")
+        if answer is not None:
+            return answer
+        return self.answer_chain.with_listeners(
+            on_end=lambda run: self.semantic_cache.store(cache_key, (run.outputs or {}).get("output"))
+        )
+
     def _format_docs(self, docs):
-        return "\n\n".join(d.page_content for d in docs)
+        return self.context_packer.pack(docs)
+
+    def _retrieval_steps(self):
+        """
+        question -> documents, as one `retrieve` retriever run. A similarity VectorStoreRetriever
+        is swapped for a _TracedVectorStoreRetriever over the same store, so query embedding is
+        timed as its own nested `embed_query` step.
+        """
+        retriever = self.retriever
+        if (type(retriever) is VectorStoreRetriever and retriever.search_type == "similarity"
+                and retriever.vectorstore.embeddings is not None):
+            retriever = _TracedVectorStoreRetriever(
+                vectorstore=retriever.vectorstore, search_type=retriever.search_type,
+                search_kwargs=dict(retriever.search_kwargs), tags=retriever.tags, metadata=retriever.metadata,
+            )
+        return retriever.with_config(run_name="retrieve")
 
     def _build_lcel_chain(self):
         try:
-            question_rewriter= (
+            self.question_rewriter= (
                 {'input': itemgetter("input"), "chat_history": itemgetter("chat_history")}
                 | self.contextualize_prompt
                 | self.llm
                 | StrOutputParser()
             )
+            question_rewriter= RunnableLambda(
+                self._rewrite_question, afunc=self._arewrite_question
+            ).with_config(run_name="rewrite")
 
-            retrieved_docs= question_rewriter | self.retriever | self._format_docs
+            retrieved_docs= (
+                itemgetter("question")
+                | self._retrieval_steps()
+                | RunnableLambda(self._format_docs).with_config(run_name="format_docs")
+            )
 
-            rag_chain= (
+            self.answer_chain= (
                 {
                     "documents": retrieved_docs,
                     "input": itemgetter("input"),
                     "chat_history": itemgetter("chat_history"),
                 }
                 | self.qa_prompt
-                | self.llm
+                | self.llm.with_config(run_name="generate")
                 | StrOutputParser()
             )
 
-            self.chain= RunnableWithMessageHistory(
+            answer= self.answer_chain if self.semantic_cache is None else RunnableLambda(self._answer_or_cached)
+            rag_chain= (
+                RunnablePassthrough.assign(chat_history= self._window_history)
+                | RunnablePassthrough.assign(question= question_rewriter)
+                | answer
+            )
+
+            self.chain= _TurnHistory(
                 rag_chain,
                 get_session_history,
                 input_messages_key="input",
                 history_messages_key="chat_history",
-                output_messages_key="answer",
+                # rag_chain returns a plain string, so there is no output key to pick
             )
 
             self.log.info("Chain has been built successfully", session_id= self.session_id)
@@ -0,0 +1,177 @@
+import re
+from typing import List, Optional, Sequence
+
+from langchain_core.documents import Document
+from utils.tokens import estimate_tokens
+
+_WORD = re.compile(r"\w+")
+
+
+def _shingles(text: str, size: int = 5) -> set:
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _text_overlap(left: str, right: str, min_overlap: int, max_overlap: int) -> int:
+    """Length of the longest suffix of `left` that is a prefix of `right` (0 if shorter than min_overlap)."""
+    for size in range(min(len(left), len(right), max_overlap), min_overlap - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+class _Block:
+    """Contiguous text from one source, carrying the best rank of the chunks merged into it."""
+
+    def __init__(self, doc: Document, rank: int):
+        self.source = doc.metadata.get("source")
+        self.start = doc.metadata.get("start_index")
+        self.text = doc.page_content
+        self.rank = rank
+        self._shingles = None
+
+    @property
+    def end(self) -> Optional[int]:
+        return None if self.start is None else self.start + len(self.text)
+
+    @property
+    def shingles(self) -> set:
+        if self._shingles is None:
+            self._shingles = _shingles(self.text)
+        return self._shingles
+
+    def absorb(self, other: "_Block", overlap: int) -> None:
+        self.text += other.text[overlap:]
+        self.rank = min(self.rank, other.rank)
+        self._shingles = None
+
+
+class ContextPacker:
+    """
+    Turns retrieved chunks into the QA prompt's context: overlapping or adjacent chunks
+    from the same source are stitched back together, near-duplicates are dropped, and
+    blocks are added in relevance (optionally MMR) order until the token budget is spent.
+    """
+
+    def __init__(self, max_tokens: int = 3000, dedup_threshold: float = 0.85, use_mmr: bool = False,
+                 mmr_lambda: float = 0.7, max_overlap: int = 400, separator: str = "\n\n"):
+        """
+        :param max_tokens: estimated token budget for the packed context
+        :param dedup_threshold: word 5-shingle Jaccard above which a block counts as a duplicate
+        :param use_mmr: re-rank blocks by maximal marginal relevance before filling the budget
+        :param mmr_lambda: relevance vs. diversity trade-off for MMR (1.0 = relevance only)
+        :param max_overlap: longest text overlap looked for when chunks carry no start_index
+        """
+        self.max_tokens = max_tokens
+        self.dedup_threshold = dedup_threshold
+        self.use_mmr = use_mmr
+        self.mmr_lambda = mmr_lambda
+        self.max_overlap = max_overlap
+        self.separator = separator
+
+    @classmethod
+    def from_config(cls, context_config: Optional[dict]) -> "ContextPacker":
+        """Build from the `retriever.context` block of config.yaml."""
+        context_config = context_config or {}
+        return cls(
+            max_tokens=context_config.get("max_tokens", 3000),
+            dedup_threshold=context_config.get("dedup_threshold", 0.85),
+            use_mmr=context_config.get("mmr", False),
+            mmr_lambda=context_config.get("mmr_lambda", 0.7),
+        )
+
+    def _merge(self, docs: Sequence[Document]) -> List[_Block]:
+        by_source = {}
+        for rank, doc in enumerate(docs):
+            by_source.setdefault(doc.metadata.get("source"), []).append(_Block(doc, rank))
+
+        merged = []
+        for blocks in by_source.values():
+            if all(b.start is not None for b in blocks):
+                blocks.sort(key=lambda b: b.start)
+                current = blocks[0]
+                for block in blocks[1:]:
+                    if block.start > current.end:
+                        merged.append(current)
+                        current = block
+                    elif block.end > current.end:
+                        current.absorb(block, current.end - block.start)
+                    else:  # fully contained in what we already have
+                        current.rank = min(current.rank, block.rank)
+                merged.append(current)
+                continue
+
+            # no offsets recorded: stitch pairs whose text overlaps end-to-start
+            pending = list(blocks)
+            while pending:
+                current = pending.pop(0)
+                stitched = True
+                while stitched:
+                    stitched = False
+                    for other in pending:
+                        overlap = _text_overlap(current.text, other.text, 50, self.max_overlap)
+                        if overlap:
+                            current.absorb(other, overlap)
+                        else:
+                            overlap = _text_overlap(other.text, current.text, 50, self.max_overlap)
+                            if not overlap:
+                                continue
+                            other.absorb(current, overlap)
+                            current = other
+                        pending.remove(other)
+                        stitched = True
+                        break
+                merged.append(current)
+        return sorted(merged, key=lambda b: b.rank)
+
+    def _drop_duplicates(self, blocks: List[_Block]) -> List[_Block]:
+        kept = []
+        for block in blocks:
+            if all(_jaccard(block.shingles, k.shingles) < self.dedup_threshold for k in kept):
+                kept.append(block)
+        return kept
+
+    def _mmr(self, blocks: List[_Block]) -> List[_Block]:
+        # retriever order is the only relevance signal here, so relevance decays with rank
+        total = len(blocks)
+        relevance = {id(b): 1.0 - i / total for i, b in enumerate(blocks)}
+        remaining, ordered = list(blocks), []
+        while remaining:
+            best = max(
+                remaining,
+                key=lambda b: self.mmr_lambda * relevance[id(b)] - (1 - self.mmr_lambda) * max(
+                    (_jaccard(b.shingles, s.shingles) for s in ordered), default=0.0),
+            )
+            ordered.append(best)
+            remaining.remove(best)
+        return ordered
+
+    def pack(self, docs: Sequence[Document]) -> str:
+        """
+        :param docs: retrieved documents, most relevant first
+        :return: context string within `max_tokens`
+        """
+        blocks = self._drop_duplicates(self._merge(docs))
+        if self.use_mmr:
+            blocks = self._mmr(blocks)
+
+        packed, used = [], 0
+        separator_tokens = estimate_tokens(self.separator)
+        for block in blocks:
+            tokens = estimate_tokens(block.text) + (separator_tokens if packed else 0)
+            if used + tokens <= self.max_tokens:
+                packed.append(block.text)
+                used += tokens
+            elif not packed:
+                # the single most relevant block is bigger than the budget: keep its head
+                packed.append(block.text[:self.max_tokens * 4])
+                used = self.max_tokens
+        return self.separator.join(packed)
@@ -1,25 +1,46 @@
-import uuid
+import math
 from pathlib import Path
 import sys
-from datetime import datetime
-from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, TextLoader
+from typing import Iterable, Optional
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from log_utils.custom_logging import CustomLogger
 from exception.custom_exeption import CustomException
 from utils.model_loader import ModelLoader
+from utils.embedding_executor import EmbeddingExecutor
+from utils.tokens import estimate_tokens
+from src.news_summarizer.index_store import FaissIndexStore, chunk_id
+from src.news_summarizer.index_factory import IndexFactory
+from src.news_summarizer.shard_manager import shard_dir
+from src.news_summarizer.near_duplicates import NearDuplicateIndex
 
 class NewsIngestor:
-    def __init__(self, temp_dir: str = "data/new_ingestor", faiss_dir: str= "faiss_index"):
+    def __init__(self, faiss_dir: str= "faiss_index",
+                 window_size: int = 256, read_block_chars: int = 200_000, collection: Optional[str] = None,
+                 embeddings=None):
+        """
+        :param faiss_dir: directory of the saved index, or the root of the shards when `collection` is set
+        :param collection: ticker or collection name; its chunks go to their own shard under `faiss_dir`
+        :param embeddings: embedding model to use instead of the configured one
+        :param window_size: chunks embedded and added to the index per window
+        :param read_block_chars: characters read from a file at a time
+        """
         try:
             self.log = CustomLogger().get_logger(__name__)
 
             # base dirs
-            self.temp_dir = Path(temp_dir)
-            self.faiss_dir = Path(faiss_dir)
-            self.temp_dir.mkdir(parents=True, exist_ok=True)
+            self.collection = collection
+            self.faiss_dir = shard_dir(faiss_dir, collection) if collection else Path(faiss_dir)
             self.faiss_dir.mkdir(parents=True, exist_ok=True)
 
+            self.window_size = window_size
+            self.read_block_chars = read_block_chars
+            # start_index lets the chat side stitch overlapping neighbours back together
+            self.splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, add_start_index=True)
+            self.last_ingest_report = None
+            self.last_removal_report = None
+
             # # sessionzed_path (Future)
             # self.session_id = session_id or f"session_{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
             # self.session_temp_dir = self.temp_dir / self.session_id
@@ -28,11 +49,16 @@ class NewsIngestor:
             # self.session_faiss_dir.mkdir(parents=True, exist_ok=True)
 
             self.model_loader = ModelLoader()
+            self.embeddings = embeddings
+            self.index_factory = IndexFactory.from_config(self.model_loader.config.get("faiss_db"))
+            self.near_duplicates = NearDuplicateIndex.from_config(
+                self.model_loader.config.get("near_duplicates"), str(self.faiss_dir)
+            )
 
             self.log.info(
                 "Document Ingestion initiated",
-                temp_base= str(self.temp_dir),
                 faiss_dir= str(self.faiss_dir),
+                collection= self.collection,
                 # Add sessions
             )
         except Exception as e:
@@ -67,61 +93,275 @@ class NewsIngestor:
     #     except Exception as e:
     #         self.log.error("Failed to ingest files to vector-database", error=str(e))
 
-    def ingest_files(self, text_files):
-        try:
-            text_data = []
-
-            for file_path in text_files:
-                unique_para_name = f"{uuid.uuid4().hex[:8]}.txt"
-                temp_path = self.temp_dir / unique_para_name
+    def _load_embeddings(self):
+        return self.embeddings if self.embeddings is not None else self.model_loader.load_embedding_model()
 
-                with open(file_path, "rb") as source_file:
-                    content = source_file.read()
+    def ingest_files(self, text_files, append: bool = True):
+        """
+        Ingest text files into the FAISS index, streaming them from their source paths.
+        Files that cannot be read are logged and listed under `failed` in `last_ingest_report`, files
+        that broke off after some of their blocks were indexed under `partial`; the rest are still indexed.
+        :param text_files: paths of the files to ingest
+        :param append: add only unseen chunks to the saved index; False rebuilds it from these files
+        :return: retriever over the updated index
+        """
+        report = {"files": 0, "failed": [], "partial": []}
+        retriever = self.ingest_documents(self.iter_text_files(text_files, report), append=append, report=report,
+                                          skip_near_duplicates=True)
+        if report["failed"] or report["partial"]:
+            self.log.warning("Some files were not ingested", failed=len(report["failed"]),
+                             partial=len(report["partial"]), files=report["files"])
+        return retriever
 
-                with open(temp_path, "wb") as f:
-                    f.write(content)
+    def iter_text_files(self, text_files, report: Optional[dict] = None):
+        """
+        Yield each file as documents of at most `read_block_chars` characters, cut on paragraph
+        or line breaks, so a large file never sits in memory whole.
+        :param text_files: paths of the files to read
+        :param report: dict whose `files` count and `failed` / `partial` lists are updated; a file that
+            breaks off after some blocks were yielded is `partial`, with the characters yielded so far
+        """
+        report = report if report is not None else {"files": 0, "failed": []}
+        for file_path in text_files:
+            report["files"] += 1
+            offset, carry = 0, ""
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    while True:
+                        block = f.read(self.read_block_chars)
+                        text = carry + block
+                        if len(block) < self.read_block_chars:  # end of file: keep the tail with its block
+                            if text.strip():
+                                yield Document(page_content=text, metadata={"source": str(file_path), "block_start": offset})
+                            break
+                        cut = self._block_cut(text)
+                        if cut:
+                            yield Document(page_content=text[:cut], metadata={"source": str(file_path), "block_start": offset})
+                        offset, carry = offset + cut, text[cut:]
+                self.log.info("File streamed for ingestion", filename=str(file_path), chars=offset + len(text))
+            except Exception as e:
+                self.log.error("Failed to read file for ingestion", filename=str(file_path), error=str(e))
+                if offset:
+                    # the blocks before the failure are already on their way into the index
+                    report.setdefault("partial", []).append({"file": str(file_path), "error": str(e), "indexed_chars": offset})
+                else:
+                    report["failed"].append({"file": str(file_path), "error": str(e)})
 
-                self.log.info(
-                    "File saved for ingestion",
-                    filename=file_path,
-                    saved_as=str(temp_path)
-                )
+    def _block_cut(self, text: str) -> int:
+        """End of the last whole paragraph (or line, or word) in the first half-or-more of `text`."""
+        floor = len(text) // 2
+        for separator in ("\n\n", "\n", " "):
+            cut = text.rfind(separator, floor)
+            if cut != -1:
+                return cut + len(separator)
+        return len(text)
 
-                loader = TextLoader(str(temp_path), encoding="utf-8")
-                docs = loader.load()
-                text_data.extend(docs)
+    def _split(self, document: Document):
+        """Split one document; `start_index` is made file-relative using `block_start`."""
+        block_start = document.metadata.pop("block_start", 0)
+        chunks = self.splitter.split_documents([document])
+        for chunk in chunks:
+            chunk.metadata["start_index"] = chunk.metadata.get("start_index", 0) + block_start
+        return chunks
 
-            if not text_data:
-                raise CustomException("No file data found", sys)
+    @staticmethod
+    def _chunk_id(chunk: Document) -> str:
+        return chunk_id(str(chunk.metadata.get("source")), chunk.page_content)
 
-            self.log.info("Paragraph has been loaded")
-            return self._create_retriever(text_data)
+    def _near_duplicate(self, document: Document):
+        """(canonical source, block_start, similarity) when the document repeats another source's text, else None."""
+        if self.near_duplicates is None:
+            return None
+        return self.near_duplicates.check(document)
 
-        except Exception as e:
-            self.log.error("Failed to ingest files to vector-database", error=str(e))
+    @staticmethod
+    def _update_duplicate_links(vector_store, add: Optional[dict] = None, drop: Iterable[str] = ()) -> int:
+        """
+        Edit the `duplicate_sources` metadata of indexed chunks in one pass: `add` maps a canonical
+        source to the sources repeating it, `drop` lists sources to unlink everywhere.
+        :return: number of chunks changed
+        """
+        add, drop = add or {}, {str(s) for s in drop}
+        changed = 0
+        for doc_id in vector_store.index_to_docstore_id.values():
+            doc = vector_store.docstore.search(doc_id)
+            if not hasattr(doc, "metadata"):
+                continue
+            current = sorted(doc.metadata.get("duplicate_sources") or [])
+            updated = sorted((set(current) | add.get(str(doc.metadata.get("source")), set())) - drop)
+            if updated != current:
+                if updated:
+                    doc.metadata["duplicate_sources"] = updated
+                else:
+                    doc.metadata.pop("duplicate_sources", None)
+                changed += 1
+        return changed
 
-    def _create_retriever(self, documents):
+    def ingest_documents(self, documents: Iterable[Document], append: bool = True, report: Optional[dict] = None,
+                         skip_near_duplicates: bool = False):
+        """
+        Split, embed and index documents in windows of `window_size` chunks; `documents` may be
+        a lazy iterator and is consumed once. With `skip_near_duplicates`, a document that nearly
+        repeats another source's text (a syndicated story) is not chunked into the index; its
+        source is listed in the `duplicate_sources` metadata of the canonical copy's chunks instead. Near-duplicate
+        records are committed only once the index is saved, so a failed run leaves none behind.
+        :param documents: documents with a `source` in their metadata
+        :param append: add only unseen chunks to the saved index; False rebuilds it from these documents
+        :param report: dict updated with chunk counts and near-duplicate savings; also kept as `last_ingest_report`
+        :param skip_near_duplicates: link near-duplicate news stories instead of indexing them; off for
+            documents such as report sections, where similar text from different filings must all be searchable
+        :return: retriever over the updated index
+        """
+        report = report if report is not None else {}
+        report.update(chunks=0, new_chunks=0, skipped_chunks=0,
+                      near_duplicates=0, vectors_saved=0, embedding_calls_saved=0)
+        self.last_ingest_report = report
         try:
-            splitter= RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+            embeddings = self._load_embeddings()
+            index_store = FaissIndexStore(str(self.faiss_dir), embeddings, self.index_factory)
+            vector_store = index_store.load() if append else None
+            executor = EmbeddingExecutor.from_config(embeddings, self.model_loader.config["embedding_model"])
 
-            chunks= splitter.split_documents(documents)
+            if self.near_duplicates is not None and not append:
+                self.near_duplicates.clear()
 
-            self.log.info(f"Documents split into chunks", total_chunks= len(chunks),)
+            # source + content hash doubles as the docstore id, so re-ingested text is never embedded twice
+            seen = index_store.indexed_ids(vector_store) if vector_store else set()
+            window, window_ids = [], []
+            linked, saved_ids, saved_tokens = {}, set(), 0
+            for document in documents:
+                match = self._near_duplicate(document) if skip_near_duplicates else None
+                chunks = self._split(document)
+                if match is not None:
+                    # count what indexing this copy would have cost
+                    report["near_duplicates"] += 1
+                    for chunk in chunks:
+                        doc_id = self._chunk_id(chunk)
+                        if doc_id not in seen and doc_id not in saved_ids:
+                            saved_ids.add(doc_id)
+                            saved_tokens += estimate_tokens(chunk.page_content)
+                    linked.setdefault(match[0], set()).add(str(document.metadata.get("source")))
+                    continue
 
-            embeddings= self.model_loader.load_embedding_model()
+                for chunk in chunks:
+                    report["chunks"] += 1
+                    doc_id = self._chunk_id(chunk)
+                    if doc_id in seen:
+                        report["skipped_chunks"] += 1
+                        continue
+                    seen.add(doc_id)
+                    window.append(chunk)
+                    window_ids.append(doc_id)
+                    if len(window) >= self.window_size:
+                        vector_store = self._index_window(window, window_ids, vector_store, embeddings, executor)
+                        report["new_chunks"] += len(window)
+                        window, window_ids = [], []
+            if window:
+                vector_store = self._index_window(window, window_ids, vector_store, embeddings, executor)
+                report["new_chunks"] += len(window)
 
-            vector_store= FAISS.from_documents(chunks, embeddings)
+            if saved_ids:
+                # same batching limits the executor applies
+                report["vectors_saved"] = len(saved_ids)
+                report["embedding_calls_saved"] = max(math.ceil(len(saved_ids) / executor.batch_size),
+                                                      math.ceil(saved_tokens / executor.max_batch_tokens))
+            linked_chunks = self._update_duplicate_links(vector_store, add=linked) if linked and vector_store else 0
 
-            vector_store.save_local(str(self.faiss_dir))
-            self.log.info("FAISS index saved to disk", path= str(self.faiss_dir))
+            self.log.info("Documents indexed", **{k: v for k, v in report.items() if k != "failed"})
 
-            retriever= vector_store.as_retriever(search_type= "similarity", search_kwargs= {"k": 5})
-            self.log.info("Retriever has been created and ready to use")
+            if vector_store is None:
+                raise CustomException("No chunks to index", sys)
+            if report["new_chunks"] or linked_chunks or not append:
+                # new vectors land in whatever index exists; switch type once the corpus calls for it
+                vector_store = self.index_factory.reindex_if_needed(vector_store)
+                index_store.save(vector_store)
 
+            if self.near_duplicates is not None:
+                self.near_duplicates.commit()
+
+            retriever = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 5})
+            self.log.info("Retriever has been created and ready to use")
             return retriever
         except Exception as e:
-            self.log.error("Failed to create retriever", error=str(e))
-            raise CustomException("Failed to create retriever", sys)
+            if self.near_duplicates is not None:
+                # a link to text that never reached the index would hide that story for good
+                self.near_duplicates.rollback()
+            self.log.error("Failed to ingest documents to vector-database", error=str(e))
+            raise CustomException("Failed to ingest documents to vector-database", sys)
+
+    @staticmethod
+    def _index_window(chunks, chunk_ids, vector_store, embeddings, executor):
+        # vectors stream into the index batch by batch as the executor finishes them
+        for positions, vectors in executor.iter_embeddings([c.page_content for c in chunks]):
+            text_embeddings = [(chunks[i].page_content, v) for i, v in zip(positions, vectors)]
+            metadatas = [chunks[i].metadata for i in positions]
+            ids = [chunk_ids[i] for i in positions]
+            if vector_store is None:
+                vector_store = FAISS.from_embeddings(text_embeddings, embeddings, metadatas=metadatas, ids=ids)
+            else:
+                vector_store.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+        return vector_store
+
+    def load_retriever(self):
+        """
+        Retriever over the saved index without re-ingesting. The store is opened read-only
+        (memory-mapped vectors, SQLite docstore) and shared by every session in the process.
+        :return: retriever, or None when no index has been saved yet
+        """
+        try:
+            embeddings = self._load_embeddings()
+            vector_store = FaissIndexStore(str(self.faiss_dir), embeddings, self.index_factory).shared()
+            if vector_store is None:
+                self.log.warning("No FAISS index saved yet", path=str(self.faiss_dir))
+                return None
+            return vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 5})
+        except Exception as e:
+            self.log.error("Failed to load retriever", error=str(e))
+            raise CustomException("Failed to load retriever", sys)
+
+    def remove_sources(self, sources):
+        """
+        Delete every chunk of the given source files from the saved index, without re-embedding the rest.
+        Near duplicates that were linked to a removed source are ingested in its place; the removal
+        is summarised in `last_removal_report`.
+        :param sources: source paths as recorded in the chunk metadata
+        :return: number of chunks removed
+        """
+        self.last_removal_report = {"chunks_removed": 0, "promoted": []}
+        try:
+            sources= list(sources)
+            embeddings= self._load_embeddings()
+            index_store= FaissIndexStore(str(self.faiss_dir), embeddings, self.index_factory)
+            vector_store= index_store.load()
+            if vector_store is None:
+                self.log.warning("No FAISS index to remove sources from", path= str(self.faiss_dir))
+                return 0
+
+            stale_ids= index_store.ids_for_sources(vector_store, sources)
+            if stale_ids:
+                self.index_factory.delete(vector_store, stale_ids)
+                vector_store= self.index_factory.reindex_if_needed(vector_store)
+            unlinked= self._update_duplicate_links(vector_store, drop= sources) if self.near_duplicates else 0
+            if stale_ids or unlinked:
+                index_store.save(vector_store)
+            self.last_removal_report["chunks_removed"]= len(stale_ids)
+            if self.near_duplicates is not None:
+                orphans= self.near_duplicates.remove_sources(sources)
+                if orphans:
+                    # their text was never indexed; the first copy of each story becomes canonical.
+                    # The ingest commits the removal with it, or rolls both back so a retry finds them again
+                    self.ingest_documents(orphans, append= True, skip_near_duplicates= True)
+                    self.last_removal_report["promoted"]= sorted({str(d.metadata.get("source")) for d in orphans})
+                else:
+                    self.near_duplicates.commit()
+            self.log.info("Removed stale sources from index", sources= len(sources), chunks_removed= len(stale_ids),
+                          promoted= len(self.last_removal_report["promoted"]))
+            return len(stale_ids)
+        except Exception as e:
+            if self.near_duplicates is not None:
+                self.near_duplicates.rollback()
+            self.log.error("Failed to remove sources from index", error=str(e))
+            raise CustomException("Failed to remove sources from index", sys)
 
 ## Testing retriever
 
@@ -0,0 +1,244 @@
+import sys
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, SystemMessage, messages_from_dict, message_to_dict, trim_messages
+from langchain_core.output_parsers import StrOutputParser
+from log_utils.custom_logging import CustomLogger
+from exception.custom_exeption import CustomException
+from utils.lru_cache import LRUCache
+from utils.tokens import estimate_tokens
+from prompts.prompt_library import history_summary_prompt
+
+# (previous summary, messages falling out of the window) -> new summary
+Summarizer = Callable[[str, List[BaseMessage]], str]
+
+
+def count_message_tokens(messages: Sequence[BaseMessage]) -> int:
+    """Token estimate for a list of messages, used as trim_messages' counter."""
+    return sum(estimate_tokens(str(m.content)) + 4 for m in messages)
+
+
+def history_summarizer(llm) -> Summarizer:
+    """Summarizer that folds turns falling out of the history window into the running summary with `llm`."""
+    chain = history_summary_prompt | llm | StrOutputParser()
+
+    def summarize(previous_summary: str, dropped: List[BaseMessage]) -> str:
+        transcript = "\n".join(f"{m.type}: {m.content}" for m in dropped)
+        return chain.invoke({"summary": previous_summary or "(none)", "transcript": transcript})
+
+    return summarize
+
+
+def window_messages(messages: Sequence[BaseMessage], max_tokens: int) -> List[BaseMessage]:
+    """
+    Keep the most recent turns that fit in `max_tokens`, starting on a human message.
+    A leading summary SystemMessage is always kept.
+    """
+    if not messages:
+        return []
+    return trim_messages(
+        list(messages),
+        max_tokens=max_tokens,
+        token_counter=count_message_tokens,
+        strategy="last",
+        start_on="human",
+        include_system=True,
+        allow_partial=False,
+    )
+
+
+class BoundedChatMessageHistory(BaseChatMessageHistory):
+    """
+    In-memory history that keeps at most `max_messages`. Older messages are dropped,
+    or folded into a running summary when a `summarizer` is given. The summarizer runs
+    outside the message lock, so reads and appends never wait on its LLM call.
+    """
+
+    def __init__(self, max_messages: int = 40, summarizer: Optional[Summarizer] = None):
+        self.max_messages = max_messages
+        self.summarizer = summarizer
+        self.summary = ""
+        self._messages: List[BaseMessage] = []
+        self._unsummarized: List[BaseMessage] = []  # dropped, not yet folded into the summary
+        self._lock = threading.Lock()
+        self._summary_lock = threading.Lock()
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        with self._lock:
+            recent = list(self._messages)
+            summary = self.summary
+        if summary:
+            return [SystemMessage(content=f"Summary of the earlier conversation: {summary}")] + recent
+        return recent
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        with self._lock:
+            self._messages.extend(messages)
+            overflow = len(self._messages) - self.max_messages
+            if overflow <= 0:
+                self._persist(list(messages), [], None)
+                return
+            # drop whole turns so the window still starts on a human message,
+            # but never past the last one: the newest turn always stays
+            humans = [i for i, m in enumerate(self._messages) if m.type == "human"]
+            overflow = next((i for i in humans if i >= overflow), humans[-1] if humans else overflow)
+            dropped = self._messages[:overflow]
+            self._messages = self._messages[overflow:]
+            self._persist(list(messages), dropped, None)
+            if self.summarizer is None or not dropped:
+                return
+            self._unsummarized.extend(dropped)
+        self._fold_summary()
+
+    def _fold_summary(self) -> None:
+        # one summarizer call at a time, taking every dropped message in order
+        with self._summary_lock:
+            with self._lock:
+                dropped, self._unsummarized = self._unsummarized, []
+                previous = self.summary
+            if not dropped:
+                return
+            try:
+                summary = self.summarizer(previous, dropped)
+            except Exception:
+                with self._lock:
+                    self._unsummarized = dropped + self._unsummarized
+                raise
+            with self._lock:
+                self.summary = summary
+                self._persist([], [], summary)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._messages = []
+            self._unsummarized = []
+            self.summary = ""
+            self._clear_persisted()
+
+    # persistence hooks, no-ops for the in-memory history
+    def _persist(self, added: List[BaseMessage], dropped: List[BaseMessage], summary: Optional[str]) -> None:
+        pass
+
+    def _clear_persisted(self) -> None:
+        pass
+
+
+class SQLiteChatMessageHistory(BoundedChatMessageHistory):
+    """
+    BoundedChatMessageHistory that writes through to SQLite, so sessions survive
+    eviction from memory and process restarts.
+    """
+
+    def __init__(self, session_id: str, conn: sqlite3.Connection, conn_lock: threading.Lock,
+                 max_messages: int = 40, summarizer: Optional[Summarizer] = None):
+        super().__init__(max_messages=max_messages, summarizer=summarizer)
+        self.session_id = session_id
+        self._conn = conn
+        self._conn_lock = conn_lock
+        with self._conn_lock:
+            rows = self._conn.execute(
+                "SELECT message FROM chat_messages WHERE session_id = ? ORDER BY id", (session_id,)
+            ).fetchall()
+            summary = self._conn.execute(
+                "SELECT summary FROM chat_summaries WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        self._messages = messages_from_dict([json.loads(row[0]) for row in rows])
+        self.summary = summary[0] if summary else ""
+
+    def _persist(self, added, dropped, summary):
+        with self._conn_lock:
+            if added:
+                self._conn.executemany(
+                    "INSERT INTO chat_messages (session_id, message) VALUES (?, ?)",
+                    [(self.session_id, json.dumps(message_to_dict(m))) for m in added],
+                )
+            if dropped:
+                self._conn.execute(
+                    "DELETE FROM chat_messages WHERE id IN "
+                    "(SELECT id FROM chat_messages WHERE session_id = ? ORDER BY id LIMIT ?)",
+                    (self.session_id, len(dropped)),
+                )
+            if summary is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO chat_summaries (session_id, summary) VALUES (?, ?)",
+                    (self.session_id, summary),
+                )
+            self._conn.commit()
+
+    def _clear_persisted(self):
+        with self._conn_lock:
+            self._conn.execute("DELETE FROM chat_messages WHERE session_id = ?", (self.session_id,))
+            self._conn.execute("DELETE FROM chat_summaries WHERE session_id = ?", (self.session_id,))
+            self._conn.commit()
+
+
+class SessionHistoryStore:
+    """
+    Session id -> bounded chat history. Idle sessions are evicted after `idle_ttl`
+    seconds and the least recently used beyond `max_sessions`; with `sqlite_path`
+    set, an evicted session is reloaded from disk on its next turn.
+    """
+
+    def __init__(self, max_sessions: int = 1000, idle_ttl: Optional[float] = 3600.0, max_messages: int = 40,
+                 sqlite_path: Optional[str] = None, summarizer: Optional[Summarizer] = None):
+        self.log = CustomLogger().get_logger(__name__)
+        self.max_messages = max_messages
+        self.summarizer = summarizer
+        self._sessions = LRUCache(maxsize=max_sessions, ttl=idle_ttl)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_lock = threading.Lock()
+        if sqlite_path:
+            try:
+                Path(sqlite_path).parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(sqlite_path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS chat_messages ("
+                    "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, message TEXT NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chat_session ON chat_messages(session_id, id)")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS chat_summaries (session_id TEXT PRIMARY KEY, summary TEXT NOT NULL)"
+                )
+                self._conn.commit()
+            except Exception as e:
+                self.log.error("Failed to open chat history database", path=sqlite_path, error=str(e))
+                raise CustomException("Failed to open chat history database", sys)
+
+    @classmethod
+    def from_config(cls, history_config: Optional[dict], summarizer: Optional[Summarizer] = None) -> "SessionHistoryStore":
+        """Build from the `chat_history` block of config.yaml."""
+        history_config = history_config or {}
+        return cls(
+            max_sessions=history_config.get("max_sessions", 1000),
+            idle_ttl=history_config.get("idle_ttl_seconds", 3600),
+            max_messages=history_config.get("max_messages", 40),
+            sqlite_path=history_config.get("sqlite_path"),
+            summarizer=summarizer,
+        )
+
+    def get(self, session_id: str) -> BaseChatMessageHistory:
+        """Retrieve or create the history for a session."""
+        with self._lock:
+            history = self._sessions.get(session_id)
+            if history is None:
+                if self._conn is not None:
+                    history = SQLiteChatMessageHistory(
+                        session_id, self._conn, self._conn_lock,
+                        max_messages=self.max_messages, summarizer=self.summarizer,
+                    )
+                else:
+                    history = BoundedChatMessageHistory(max_messages=self.max_messages, summarizer=self.summarizer)
+            # re-put on every access so the idle TTL counts from the last turn
+            self._sessions.put(session_id, history)
+            return history
+
+    def __len__(self) -> int:
+        return len(self._sessions)
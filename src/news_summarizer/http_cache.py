@@ -0,0 +1,203 @@
+import json
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import requests
+from utils.lru_cache import LRUCache
+
+# query params that identify the caller rather than the resource; never part of a key or written to disk
+SECRET_PARAMS = ("apikey", "api_key", "token")
+
+
+def normalize_url(url: str, params: Optional[Dict[str, object]] = None,
+                  ignore_params: Iterable[str] = SECRET_PARAMS) -> str:
+    """
+    Canonical cache key: lower-cased scheme and host, no fragment, query params merged and sorted.
+
+    :param url: Request URL, possibly with its own query string.
+    :param params: Extra query params, as passed to requests.
+    :param ignore_params: Param names (case-insensitive) left out of the key.
+    :return: Normalized URL string.
+    """
+    parts = urlsplit(url)
+    ignored = {p.lower() for p in ignore_params}
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    query += [(k, str(v)) for k, v in (params or {}).items() if v is not None]
+    query = sorted((k, v) for k, v in query if k.lower() not in ignored)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", urlencode(query), ""))
+
+
+class ResponseCache(ABC):
+    """
+    Storage interface for cached responses. An entry is a dict with
+    'body', 'etag', 'last_modified' and 'fetched_at' (epoch seconds).
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, entry: dict) -> None:
+        ...
+
+
+class MemoryResponseCache(ResponseCache):
+    """Per-process LRU of responses."""
+
+    def __init__(self, max_entries: int = 512):
+        self._lru = LRUCache(maxsize=max_entries)
+
+    def get(self, key: str) -> Optional[dict]:
+        return self._lru.get(key)
+
+    def set(self, key: str, entry: dict) -> None:
+        self._lru.put(key, entry)
+
+
+class DiskResponseCache(ResponseCache):
+    """SQLite-backed responses, shared by every process on the machine."""
+
+    def __init__(self, path: str = "data/http_cache.sqlite", max_entries: int = 5000):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, entry TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT entry FROM responses WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, entry: dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, entry, fetched_at) VALUES (?, ?, ?)",
+                (key, json.dumps(entry), entry["fetched_at"]),
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE key NOT IN "
+                "(SELECT key FROM responses ORDER BY fetched_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+
+class TieredResponseCache(ResponseCache):
+    """Memory in front of disk; disk hits are promoted into memory."""
+
+    def __init__(self, memory: Optional[ResponseCache] = None, disk: Optional[ResponseCache] = None):
+        self.memory = memory or MemoryResponseCache()
+        self.disk = disk or DiskResponseCache()
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self.memory.get(key)
+        if entry is None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                self.memory.set(key, entry)
+        return entry
+
+    def set(self, key: str, entry: dict) -> None:
+        self.memory.set(key, entry)
+        self.disk.set(key, entry)
+
+
+class CachingHttpClient:
+    """
+    GETs through a ResponseCache. Fresh entries are served locally; stale ones
+    are revalidated with If-None-Match / If-Modified-Since and refreshed on a 304.
+    Concurrent requests for the same key share one network call.
+    """
+
+    def __init__(self, session: requests.Session, cache: ResponseCache,
+                 ttl_rules: Optional[Dict[str, float]] = None, default_ttl: float = 300.0):
+        """
+        :param session: Session used for network calls.
+        :param cache: Where responses are stored.
+        :param ttl_rules: URL prefix -> seconds a response stays fresh; the longest matching prefix wins.
+        :param default_ttl: Freshness for URLs no rule matches.
+        """
+        self.session = session
+        self.cache = cache
+        self.ttl_rules = ttl_rules or {}
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        # key -> [lock, threads holding or waiting on it]; dropped when the last one leaves,
+        # so a long-running process does not keep one lock per URL it ever fetched
+        self._key_locks: Dict[str, List] = {}
+        self._key_locks_lock = threading.Lock()
+
+    def ttl_for(self, url: str) -> float:
+        matches = [prefix for prefix in self.ttl_rules if url.startswith(prefix)]
+        return self.ttl_rules[max(matches, key=len)] if matches else self.default_ttl
+
+    @contextmanager
+    def _key_lock(self, key: str) -> Iterator[None]:
+        with self._key_locks_lock:
+            slot = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            slot[1] += 1
+        try:
+            with slot[0]:
+                yield
+        finally:
+            with self._key_locks_lock:
+                slot[1] -= 1
+                if slot[1] == 0:
+                    del self._key_locks[key]
+
+    def _count(self, counter: str) -> None:
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, url: str, params: Optional[Dict[str, object]] = None, timeout=None) -> str:
+        """
+        :return: Response body text.
+        :raises requests.HTTPError: on a non-2xx response that is not a 304.
+        """
+        key = normalize_url(url, params)
+        ttl = self.ttl_for(key)
+        with self._key_lock(key):
+            entry = self.cache.get(key)
+            if entry is not None and time.time() - entry["fetched_at"] < ttl:
+                self._count("hits")
+                return entry["body"]
+
+            headers = {}
+            if entry is not None:
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+
+            response = self.session.get(url, params=params, headers=headers, timeout=timeout)
+            if response.status_code == 304 and entry is not None:
+                entry["fetched_at"] = time.time()
+                self.cache.set(key, entry)
+                self._count("revalidated")
+                return entry["body"]
+
+            response.raise_for_status()
+            self._count("misses")
+            if "no-store" not in response.headers.get("Cache-Control", ""):
+                self.cache.set(key, {
+                    "body": response.text,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "fetched_at": time.time(),
+                })
+            return response.text
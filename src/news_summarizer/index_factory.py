@@ -0,0 +1,222 @@
+import sys
+import math
+from typing import Iterable, Optional
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from log_utils.custom_logging import CustomLogger
+from exception.custom_exeption import CustomException
+
+INDEX_TYPES = ("auto", "flat", "hnsw", "ivf_flat", "ivf_pq", "ivf_sq8")
+IVF_TYPES = ("ivf_flat", "ivf_pq", "ivf_sq8")
+
+
+def index_kind(index) -> str:
+    """Which of INDEX_TYPES a FAISS index is ("other" for anything this module did not build)."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexFlat):
+        return "flat"
+    if isinstance(index, faiss.IndexHNSWFlat):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFFlat):
+        return "ivf_flat"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVFScalarQuantizer):
+        return "ivf_sq8"
+    return "other"
+
+
+def reconstruct_all(index) -> np.ndarray:
+    """
+    Every stored vector, in position order. Exact for flat and HNSW, the decoded
+    approximation for PQ / SQ8.
+    """
+    if index.ntotal == 0:
+        return np.empty((0, index.d), dtype="float32")
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is None:
+        return index.reconstruct_n(0, index.ntotal)
+    ivf.make_direct_map(True)
+    try:
+        return index.reconstruct_n(0, index.ntotal)
+    finally:
+        ivf.make_direct_map(False)
+
+
+def _pq_subquantizers(dim: int, wanted: int) -> int:
+    """Largest divisor of `dim` not above `wanted` (PQ needs dim % m == 0)."""
+    for m in range(max(1, min(wanted, dim)), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+class IndexFactory:
+    """
+    Picks and builds the FAISS index behind the vector store, from the `faiss_db.index`
+    config block. Vectors always go into a flat index first; `reindex_if_needed` moves
+    them to the configured ANN type once there are enough to train on, so the flat
+    index doubles as the IVF training buffer.
+    """
+
+    def __init__(self, index_type: str = "auto", nlist: Optional[int] = None, nprobe: int = 16,
+                 hnsw_m: int = 32, ef_construction: int = 200, ef_search: int = 64,
+                 pq_m: Optional[int] = None, pq_bits: int = 8,
+                 auto_hnsw_above: int = 20_000, auto_ivf_above: int = 500_000):
+        """
+        :param index_type: one of INDEX_TYPES; "auto" chooses by corpus size
+        :param nlist: IVF cells; None = 4 * sqrt(vectors)
+        :param nprobe: IVF cells scanned per query
+        :param hnsw_m: HNSW graph degree
+        :param ef_construction: HNSW build-time beam width
+        :param ef_search: HNSW query-time beam width
+        :param pq_m: PQ sub-quantizers; None = dim / 8
+        :param pq_bits: bits per PQ code
+        :param auto_hnsw_above: "auto" switches from flat to HNSW above this many vectors
+        :param auto_ivf_above: "auto" switches from HNSW to IVF-SQ8 above this many vectors
+        """
+        self.log = CustomLogger().get_logger(__name__)
+        if index_type not in INDEX_TYPES:
+            self.log.error("Unknown FAISS index type", index_type=index_type)
+            raise ValueError(f"Unknown FAISS index type: {index_type}")
+        self.index_type = index_type
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.hnsw_m = hnsw_m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.pq_m = pq_m
+        self.pq_bits = pq_bits
+        self.auto_hnsw_above = auto_hnsw_above
+        self.auto_ivf_above = auto_ivf_above
+
+    @classmethod
+    def from_config(cls, faiss_config: Optional[dict]) -> "IndexFactory":
+        """Build from the `faiss_db` block of config.yaml."""
+        index_config = (faiss_config or {}).get("index") or {}
+        return cls(
+            index_type=index_config.get("type", "auto"),
+            nlist=index_config.get("nlist"),
+            nprobe=index_config.get("nprobe", 16),
+            hnsw_m=index_config.get("hnsw_m", 32),
+            ef_construction=index_config.get("ef_construction", 200),
+            ef_search=index_config.get("ef_search", 64),
+            pq_m=index_config.get("pq_m"),
+            pq_bits=index_config.get("pq_bits", 8),
+            auto_hnsw_above=index_config.get("auto_hnsw_above", 20_000),
+            auto_ivf_above=index_config.get("auto_ivf_above", 500_000),
+        )
+
+    def nlist_for(self, n_vectors: int) -> int:
+        return self.nlist or min(65_536, max(16, int(4 * math.sqrt(n_vectors))))
+
+    def min_train_size(self, index_type: str, n_vectors: int) -> int:
+        """Vectors needed before an IVF index of this config can be trained well."""
+        size = 39 * self.nlist_for(n_vectors)
+        if index_type == "ivf_pq":
+            size = max(size, 39 * 2 ** self.pq_bits)  # each PQ codebook has 2**pq_bits centroids
+        return size
+
+    def resolve(self, n_vectors: int) -> str:
+        """Concrete index type for a corpus of `n_vectors`."""
+        index_type = self.index_type
+        if index_type == "auto":
+            if n_vectors <= self.auto_hnsw_above:
+                return "flat"
+            index_type = "hnsw" if n_vectors <= self.auto_ivf_above else "ivf_sq8"
+        if index_type in IVF_TYPES and n_vectors < self.min_train_size(index_type, n_vectors):
+            return "flat"  # too few vectors to train on yet
+        return index_type
+
+    def build(self, index_type: str, vectors: np.ndarray):
+        """
+        New index of `index_type`, trained on and holding `vectors` in the given order.
+        """
+        n_vectors, dim = vectors.shape
+        if index_type == "flat":
+            index = faiss.IndexFlatL2(dim)
+        elif index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, self.hnsw_m)
+            index.hnsw.efConstruction = self.ef_construction
+        else:
+            nlist = self.nlist_for(n_vectors)
+            quantizer = faiss.IndexFlatL2(dim)
+            if index_type == "ivf_flat":
+                index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+            elif index_type == "ivf_pq":
+                index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_subquantizers(dim, self.pq_m or dim // 8),
+                                         self.pq_bits)
+            else:
+                index = faiss.IndexIVFScalarQuantizer(quantizer, dim, nlist, faiss.ScalarQuantizer.QT_8bit)
+            index.train(vectors)
+        if n_vectors:
+            index.add(vectors)
+        self.configure_search(index)
+        return index
+
+    def configure_search(self, index) -> None:
+        """Apply the query-time knobs (nprobe / efSearch) to a built or loaded index."""
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf.nprobe = self.nprobe
+        kind = index_kind(index)
+        if kind == "hnsw":
+            faiss.downcast_index(index).hnsw.efSearch = self.ef_search
+
+    def reindex_if_needed(self, vector_store: FAISS) -> FAISS:
+        """
+        Move the store's vectors to the index type the config calls for at its current
+        size; a no-op when the type already matches. Positions (and so
+        `index_to_docstore_id`) are unchanged.
+        """
+        current = index_kind(vector_store.index)
+        n_vectors = vector_store.index.ntotal
+        wanted = self.resolve(n_vectors)
+        if current == wanted:
+            # an auto-sized IVF-Flat that has outgrown its cells is retrained; quantized ones are kept
+            outgrown = current == "ivf_flat" and self.nlist is None and \
+                faiss.extract_index_ivf(vector_store.index).nlist * 2 < self.nlist_for(n_vectors)
+            if not outgrown:
+                self.configure_search(vector_store.index)
+                return vector_store
+        elif current in ("ivf_pq", "ivf_sq8"):
+            # rebuilding from quantized codes would compound the error; re-ingest with append=False instead
+            self.log.warning("Keeping quantized FAISS index", index_type=current, configured=wanted)
+            self.configure_search(vector_store.index)
+            return vector_store
+        try:
+            vector_store.index = self.build(wanted, reconstruct_all(vector_store.index))
+            self.log.info("FAISS index rebuilt", from_type=current, to_type=wanted,
+                          vectors=vector_store.index.ntotal)
+            return vector_store
+        except Exception as e:
+            self.log.error("Failed to rebuild FAISS index", from_type=current, to_type=wanted, error=str(e))
+            raise CustomException("Failed to rebuild FAISS index", sys)
+
+    def delete(self, vector_store: FAISS, ids: Iterable[str]) -> None:
+        """
+        Remove docstore ids from the store. Flat indexes use FAISS's own removal; IVF ids
+        are not renumbered by remove_ids and HNSW cannot remove at all, so those keep
+        their trained structure (IVF) or are rebuilt (HNSW) from the surviving vectors.
+        """
+        ids = set(ids)
+        if not ids:
+            return
+        kind = index_kind(vector_store.index)
+        if kind == "flat":
+            vector_store.delete(list(ids))
+            return
+        mapping = vector_store.index_to_docstore_id
+        keep = [position for position in sorted(mapping) if mapping[position] not in ids]
+        vectors = reconstruct_all(vector_store.index)[keep]
+        if kind in IVF_TYPES:
+            vector_store.index.reset()  # drops the vectors, keeps the trained quantizers
+            if len(keep):
+                vector_store.index.add(vectors)
+        else:
+            vector_store.index = self.build(kind if kind != "other" else "flat", vectors)
+        present = set(mapping.values())
+        vector_store.docstore.delete([doc_id for doc_id in ids if doc_id in present])
+        vector_store.index_to_docstore_id = {i: mapping[position] for i, position in enumerate(keep)}
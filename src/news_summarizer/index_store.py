@@ -0,0 +1,229 @@
+import os
+import sys
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import faiss
+from langchain_community.vectorstores import FAISS
+from log_utils.custom_logging import CustomLogger
+from exception.custom_exeption import CustomException
+from src.news_summarizer.sqlite_docstore import DOCSTORE_FILE, open_docstore, read_docstore, write_docstore
+
+
+VERSION_FILE = "VERSION"
+
+# process-wide read-only stores: faiss_dir -> (version, store)
+_SHARED: Dict[str, Tuple[Optional[str], FAISS]] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def chunk_id(source: str, text: str) -> str:
+    """
+    Stable docstore id for a chunk: sha256 of its source and text. The same text from two
+    sources gets two ids, so each source's chunks carry its own metadata and can be removed alone.
+    """
+    return hashlib.sha256(f"{source}\0{text}".encode("utf-8")).hexdigest()
+
+
+def read_index_version(faiss_dir: str) -> Optional[str]:
+    """
+    Version token written with every save; changes whenever the index is rewritten.
+    :return: the token, or None if the directory holds no versioned index
+    """
+    try:
+        return (Path(faiss_dir) / VERSION_FILE).read_text(encoding="utf-8").strip() or None
+    except OSError:
+        return None
+
+
+def index_dir_of(vector_store) -> Optional[str]:
+    """Directory a FAISS store was loaded from or last saved to through FaissIndexStore, if any."""
+    return getattr(vector_store, "faiss_dir", None)
+
+
+def _read_index_mmap(path: str):
+    """Memory-map the index file, falling back to a plain read where this FAISS build can't."""
+    for flags in ("IO_FLAG_MMAP_IFC", "IO_FLAG_MMAP"):
+        if hasattr(faiss, flags):
+            try:
+                return faiss.read_index(path, getattr(faiss, flags) | faiss.IO_FLAG_READ_ONLY)
+            except RuntimeError:
+                continue
+    return faiss.read_index(path)
+
+
+class ReadOnlyIndexError(RuntimeError):
+    """A write was attempted on a memory-mapped, read-only FAISS store."""
+
+
+class ReadOnlyFAISS(FAISS):
+    """
+    FAISS store over a memory-mapped index and a SQLite docstore. Adding to a mapped
+    index aborts inside FAISS, so every write is refused here instead.
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise ReadOnlyIndexError("Read-only FAISS store: ingest through NewsIngestor instead")
+
+    add_texts = add_embeddings = add_documents = delete = merge_from = _read_only
+
+
+class FaissIndexStore:
+    """
+    Loads and atomically saves the FAISS index kept in one directory: `index.faiss`
+    plus a SQLite docstore (`docstore.sqlite`) in place of langchain's pickle.
+    """
+
+    INDEX_NAME = "index"
+
+    def __init__(self, faiss_dir: str, embeddings, index_factory=None):
+        """
+        :param index_factory: IndexFactory whose query-time settings are applied on load
+        """
+        self.log = CustomLogger().get_logger(__name__)
+        self.faiss_dir = Path(faiss_dir)
+        self.embeddings = embeddings
+        self.index_factory = index_factory
+
+    @property
+    def _index_path(self) -> Path:
+        return self.faiss_dir / f"{self.INDEX_NAME}.faiss"
+
+    @property
+    def _docstore_path(self) -> Path:
+        return self.faiss_dir / DOCSTORE_FILE
+
+    @property
+    def _legacy_pickle(self) -> bool:
+        """Saved before the SQLite docstore: `index.pkl` holds docstore and id mapping."""
+        return not self._docstore_path.exists() and (self.faiss_dir / f"{self.INDEX_NAME}.pkl").exists()
+
+    def exists(self) -> bool:
+        """True when a saved index is present in the directory."""
+        return self._index_path.exists() and (self._docstore_path.exists() or self._legacy_pickle)
+
+    def load(self) -> Optional[FAISS]:
+        """
+        Load the saved index fully into memory for editing, or return None when nothing
+        has been saved yet. Chat sessions should use `open_readonly` instead.
+        :return: FAISS vector store or None
+        """
+        if not self.exists():
+            return None
+        try:
+            if self._legacy_pickle:
+                vector_store = FAISS.load_local(
+                    str(self.faiss_dir),
+                    self.embeddings,
+                    index_name=self.INDEX_NAME,
+                    allow_dangerous_deserialization=True,  # we wrote this pickle ourselves
+                )
+            else:
+                docstore, index_to_docstore_id = read_docstore(str(self._docstore_path))
+                vector_store = FAISS(self.embeddings, faiss.read_index(str(self._index_path)),
+                                     docstore, index_to_docstore_id)
+            if self.index_factory is not None:
+                self.index_factory.configure_search(vector_store.index)
+            vector_store.faiss_dir = str(self.faiss_dir)
+            self.log.info("FAISS index loaded", path=str(self.faiss_dir), vectors=vector_store.index.ntotal)
+            return vector_store
+        except Exception as e:
+            self.log.error("Failed to load FAISS index", path=str(self.faiss_dir), error=str(e))
+            raise CustomException("Failed to load FAISS index", sys)
+
+    def open_readonly(self) -> Optional[FAISS]:
+        """
+        Open the saved index for querying: vectors are memory-mapped and documents are
+        fetched from SQLite per hit, so opening costs the same whatever the corpus size and
+        processes on one host share the page cache. Falls back to `load` for legacy pickles.
+        :return: read-only FAISS vector store, or None when nothing has been saved yet
+        """
+        if not self.exists():
+            return None
+        if self._legacy_pickle:
+            self.log.warning("Legacy pickled FAISS index, loading fully", path=str(self.faiss_dir))
+            return self.load()
+        try:
+            index = _read_index_mmap(str(self._index_path))
+            docstore, index_to_docstore_id = open_docstore(str(self._docstore_path))
+            if self.index_factory is not None:
+                self.index_factory.configure_search(index)
+            vector_store = ReadOnlyFAISS(self.embeddings, index, docstore, index_to_docstore_id)
+            vector_store.faiss_dir = str(self.faiss_dir)
+            self.log.info("FAISS index opened read-only", path=str(self.faiss_dir), vectors=index.ntotal)
+            return vector_store
+        except Exception as e:
+            self.log.error("Failed to open FAISS index", path=str(self.faiss_dir), error=str(e))
+            raise CustomException("Failed to open FAISS index", sys)
+
+    def shared(self) -> Optional[FAISS]:
+        """
+        Process-wide read-only store for this directory, shared by every session and
+        reopened once a save changes the index version.
+        """
+        key = str(self.faiss_dir.resolve())
+        version = self.version()
+        with _SHARED_LOCK:
+            cached = _SHARED.get(key)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            vector_store = self.open_readonly()
+            if vector_store is not None:
+                _SHARED[key] = (version, vector_store)
+            return vector_store
+
+    def save(self, vector_store: FAISS) -> None:
+        """
+        Save into a sibling temp dir, then swap it in so readers never see a half-written index.
+        Stores already open keep reading the files they opened until they notice the new version.
+        :param vector_store: store to persist
+        """
+        parent = self.faiss_dir.parent
+        parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = parent / f".{self.faiss_dir.name}.tmp-{uuid.uuid4().hex[:8]}"
+        old_dir = parent / f".{self.faiss_dir.name}.old-{uuid.uuid4().hex[:8]}"
+        version = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        try:
+            tmp_dir.mkdir()
+            faiss.write_index(vector_store.index, str(tmp_dir / f"{self.INDEX_NAME}.faiss"))
+            write_docstore(str(tmp_dir / DOCSTORE_FILE), vector_store.docstore, vector_store.index_to_docstore_id)
+            (tmp_dir / VERSION_FILE).write_text(version, encoding="utf-8")
+            if self.faiss_dir.exists():
+                os.replace(self.faiss_dir, old_dir)
+            os.replace(tmp_dir, self.faiss_dir)
+            shutil.rmtree(old_dir, ignore_errors=True)
+            vector_store.faiss_dir = str(self.faiss_dir)
+            self.log.info("FAISS index saved to disk", path=str(self.faiss_dir),
+                          vectors=vector_store.index.ntotal, version=version)
+        except Exception as e:
+            # put the previous index back if the swap got half way
+            if old_dir.exists() and not self.faiss_dir.exists():
+                os.replace(old_dir, self.faiss_dir)
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            self.log.error("Failed to save FAISS index", path=str(self.faiss_dir), error=str(e))
+            raise CustomException("Failed to save FAISS index", sys)
+
+    def version(self) -> Optional[str]:
+        """Version token of the saved index, see `read_index_version`."""
+        return read_index_version(str(self.faiss_dir))
+
+    @staticmethod
+    def indexed_ids(vector_store: FAISS) -> set:
+        """Docstore ids currently present in the index."""
+        return set(vector_store.index_to_docstore_id.values())
+
+    @staticmethod
+    def ids_for_sources(vector_store: FAISS, sources: Iterable[str]) -> List[str]:
+        """Docstore ids of every chunk whose `source` metadata is in `sources`."""
+        wanted = {str(s) for s in sources}
+        ids = []
+        for doc_id in vector_store.index_to_docstore_id.values():
+            doc = vector_store.docstore.search(doc_id)
+            if hasattr(doc, "metadata") and str(doc.metadata.get("source")) in wanted:
+                ids.append(doc_id)
+        return ids
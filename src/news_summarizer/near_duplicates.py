@@ -0,0 +1,266 @@
+import re
+import sys
+import zlib
+import json
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from log_utils.custom_logging import CustomLogger
+from exception.custom_exeption import CustomException
+
+_WORD = re.compile(r"\w+")
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def signature_path(faiss_dir: str) -> Path:
+    """Signature index kept beside an index directory (which is replaced wholesale on every save)."""
+    faiss_dir = Path(faiss_dir)
+    return faiss_dir.parent / f"{faiss_dir.name}.minhash.sqlite"
+
+
+def shingles(text: str, size: int = 5) -> np.ndarray:
+    """Distinct 32-bit hashes of the lower-cased word `size`-grams of `text`."""
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = (" ".join(words[i:i + size]) for i in range(len(words) - size + 1))
+    return np.unique(np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64))
+
+
+class MinHasher:
+    """MinHash signatures from `num_perm` seeded universal hashes (a*x + b) mod p."""
+
+    _SLICE = 4096  # shingles hashed per step, bounds the (slice x num_perm) work matrix
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        # a, b < 2**32 and x < 2**32 keep a*x + b inside uint64
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_hashes: np.ndarray) -> np.ndarray:
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(shingle_hashes), self._SLICE):
+            x = shingle_hashes[start:start + self._SLICE, None]
+            hashed = ((x * self._a + self._b) % _MERSENNE_PRIME) & _MAX_HASH
+            np.minimum(signature, hashed.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """
+    Persistent MinHash/LSH index of ingested documents, keyed by (source, block_start).
+    A document whose estimated Jaccard similarity to a document from another source
+    reaches `threshold` is a near duplicate: it is recorded as a link to that
+    canonical document instead of being chunked and embedded again. The duplicate's
+    text is kept with the link so it can take over if the canonical copy is removed.
+
+    Writes stay in an open transaction until `commit()`, so the caller can make them
+    durable only once the FAISS index they describe has been saved, or `rollback()`.
+    """
+
+    def __init__(self, path: str, threshold: float = 0.8, num_perm: int = 128, bands: int = 16,
+                 shingle_size: int = 5, min_words: int = 50):
+        """
+        :param path: SQLite file holding signatures, LSH buckets and duplicate links
+        :param threshold: estimated Jaccard similarity of word shingles that counts as a repeat
+        :param num_perm: MinHash signature length
+        :param bands: LSH bands; num_perm / bands rows each. More bands find lower-similarity candidates
+        :param shingle_size: words per shingle
+        :param min_words: shorter documents are never treated as duplicates
+        """
+        self.log = CustomLogger().get_logger(__name__)
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.min_words = min_words
+        self.hasher = MinHasher(num_perm)
+        self._lock = threading.Lock()
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                """CREATE TABLE IF NOT EXISTS signatures (
+                       id INTEGER PRIMARY KEY,
+                       source TEXT NOT NULL,
+                       block_start INTEGER NOT NULL,
+                       signature BLOB NOT NULL,
+                       UNIQUE (source, block_start));
+                   CREATE TABLE IF NOT EXISTS buckets (
+                       band INTEGER NOT NULL,
+                       bucket INTEGER NOT NULL,
+                       signature_id INTEGER NOT NULL);
+                   CREATE INDEX IF NOT EXISTS idx_bucket ON buckets(band, bucket);
+                   CREATE INDEX IF NOT EXISTS idx_bucket_signature ON buckets(signature_id);
+                   CREATE TABLE IF NOT EXISTS duplicates (
+                       source TEXT NOT NULL,
+                       block_start INTEGER NOT NULL,
+                       canonical_source TEXT NOT NULL,
+                       canonical_block_start INTEGER NOT NULL,
+                       similarity REAL NOT NULL,
+                       page_content TEXT,
+                       metadata TEXT,
+                       PRIMARY KEY (source, block_start));"""
+            )
+            # files written before the duplicate's text was kept
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(duplicates)")}
+            for column in ("page_content", "metadata"):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE duplicates ADD COLUMN {column} TEXT")
+            self._conn.commit()
+        except Exception as e:
+            self.log.error("Failed to open near-duplicate index", path=str(path), error=str(e))
+            raise CustomException("Failed to open near-duplicate index", sys)
+
+    @classmethod
+    def from_config(cls, dedup_config: Optional[dict], faiss_dir: str) -> Optional["NearDuplicateIndex"]:
+        """Build from the `near_duplicates` block of config.yaml; None when disabled."""
+        dedup_config = dedup_config or {}
+        if not dedup_config.get("enabled", False):
+            return None
+        return cls(
+            str(signature_path(faiss_dir)),
+            threshold=dedup_config.get("threshold", 0.8),
+            num_perm=dedup_config.get("num_perm", 128),
+            bands=dedup_config.get("bands", 16),
+            shingle_size=dedup_config.get("shingle_size", 5),
+            min_words=dedup_config.get("min_words", 50),
+        )
+
+    def _band_keys(self, signature: np.ndarray) -> List[int]:
+        keys = []
+        for band in range(self.bands):
+            digest = hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8).digest()
+            keys.append(int.from_bytes(digest, "little", signed=True))
+        return keys
+
+    def _best_match(self, signature: np.ndarray, keys: List[int], source: str) -> Optional[Tuple[str, int, float]]:
+        candidates = set()
+        for band, key in enumerate(keys):
+            rows = self._conn.execute("SELECT signature_id FROM buckets WHERE band = ? AND bucket = ?", (band, key))
+            candidates.update(row[0] for row in rows)
+        best = None
+        for signature_id in candidates:
+            row = self._conn.execute("SELECT source, block_start, signature FROM signatures WHERE id = ?",
+                                     (signature_id,)).fetchone()
+            if row is None or row[0] == source:
+                continue  # a source is never a duplicate of itself (re-ingests go through the content hash)
+            similarity = float(np.mean(np.frombuffer(row[2], dtype=np.uint32) == signature))
+            if similarity >= self.threshold and (best is None or similarity > best[2]):
+                best = (row[0], row[1], similarity)
+        return best
+
+    def _delete_signature(self, source: str, block_start: int) -> None:
+        row = self._conn.execute("SELECT id FROM signatures WHERE source = ? AND block_start = ?",
+                                 (source, block_start)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM buckets WHERE signature_id = ?", (row[0],))
+            self._conn.execute("DELETE FROM signatures WHERE id = ?", (row[0],))
+
+    def check(self, document: Document) -> Optional[Tuple[str, int, float]]:
+        """
+        Look a document up against every recorded document from another source. A near duplicate
+        is recorded as a link; anything else is added as a new canonical document. Uncommitted.
+        :param document: document with `source` (and optionally `block_start`) metadata
+        :return: (canonical source, canonical block_start, estimated similarity), or None if not a duplicate
+        """
+        text = document.page_content
+        source = str(document.metadata.get("source"))
+        block_start = int(document.metadata.get("block_start", 0))
+        hashes = shingles(text, self.shingle_size)
+        if len(hashes) + self.shingle_size - 1 < self.min_words:
+            return None
+        signature = self.hasher.signature(hashes)
+        keys = self._band_keys(signature)
+        with self._lock:
+            match = self._best_match(signature, keys, source)
+            self._delete_signature(source, block_start)
+            if match is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO duplicates VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (source, block_start, match[0], match[1], match[2],
+                     text, json.dumps(document.metadata, default=str)),
+                )
+            else:
+                self._conn.execute("DELETE FROM duplicates WHERE source = ? AND block_start = ?", (source, block_start))
+                cursor = self._conn.execute(
+                    "INSERT INTO signatures (source, block_start, signature) VALUES (?, ?, ?)",
+                    (source, block_start, signature.tobytes()),
+                )
+                self._conn.executemany("INSERT INTO buckets VALUES (?, ?, ?)",
+                                       [(band, key, cursor.lastrowid) for band, key in enumerate(keys)])
+        return match
+
+    def commit(self) -> None:
+        """Make the writes since the last commit durable."""
+        with self._lock:
+            self._conn.commit()
+
+    def rollback(self) -> None:
+        """Drop the writes since the last commit."""
+        with self._lock:
+            self._conn.rollback()
+
+    def duplicates_of(self, canonical_sources: Iterable[str]) -> Dict[str, List[str]]:
+        """canonical source -> sources linked to it as near duplicates."""
+        wanted = list({str(s) for s in canonical_sources})
+        if not wanted:
+            return {}
+        marks = ",".join("?" * len(wanted))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT canonical_source, source FROM duplicates WHERE canonical_source IN ({marks})", wanted
+            ).fetchall()
+        links: Dict[str, List[str]] = {}
+        for canonical, source in rows:
+            links.setdefault(canonical, []).append(source)
+        return links
+
+    def remove_sources(self, sources: Iterable[str]) -> List[Document]:
+        """
+        Forget the blocks of the given sources, whether canonical or duplicate. Blocks of other
+        sources that were linked to a removed block lose that link and are handed back, so they
+        can be checked again and ingested in its place; their other blocks and links are kept.
+        Uncommitted.
+        :return: the orphaned duplicate blocks as documents, with their original metadata
+        """
+        sources = list({str(s) for s in sources})
+        if not sources:
+            return []
+        marks = ",".join("?" * len(sources))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT source, block_start, page_content, metadata FROM duplicates"
+                f" WHERE canonical_source IN ({marks}) AND source NOT IN ({marks})"
+                " ORDER BY source, block_start", sources + sources
+            ).fetchall()
+            orphans = [Document(page_content=text, metadata=json.loads(metadata))
+                       for _, _, text, metadata in rows if text is not None]
+            self._conn.executemany("DELETE FROM duplicates WHERE source = ? AND block_start = ?",
+                                   [(source, block_start) for source, block_start, _, _ in rows])
+            self._conn.execute(
+                f"DELETE FROM buckets WHERE signature_id IN (SELECT id FROM signatures WHERE source IN ({marks}))", sources
+            )
+            self._conn.execute(f"DELETE FROM signatures WHERE source IN ({marks})", sources)
+            self._conn.execute(
+                f"DELETE FROM duplicates WHERE source IN ({marks}) OR canonical_source IN ({marks})", sources + sources
+            )
+        return orphans
+
+    def clear(self) -> None:
+        """Forget everything. Uncommitted."""
+        with self._lock:
+            for table in ("buckets", "signatures", "duplicates"):
+                self._conn.execute(f"DELETE FROM {table}")
@@ -2,9 +2,18 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
+import json
+import time
+import threading
 import requests
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from src.news_summarizer.article_extractor import extract_article, extract_article_from_soup
+from src.news_summarizer.http_cache import CachingHttpClient, ResponseCache, TieredResponseCache
+from typing import Iterator, List, Dict, Optional, Tuple, Union
 
 
 class StockNewsFetcher:
@@ -12,12 +21,79 @@ class StockNewsFetcher:
     Handles fetching and scraping of news articles for a given company or stock ticker.
     """
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, max_workers: int = 16, per_host_limit: int = 4,
+                 connect_timeout: float = 3.05, read_timeout: float = 10.0, deadline: float = 20.0,
+                 cache: Optional[ResponseCache] = None, use_cache: bool = True,
+                 news_ttl: float = 300.0, article_ttl: float = 3600.0):
+        """
+        :param max_workers: articles scraped concurrently.
+        :param per_host_limit: concurrent connections to any one host.
+        :param connect_timeout: seconds to establish a connection.
+        :param read_timeout: seconds to wait between bytes of a response.
+        :param deadline: overall seconds allowed for scraping one article list.
+        :param cache: response cache; defaults to an in-memory LRU in front of data/http_cache.sqlite.
+        :param use_cache: set False to always hit the network.
+        :param news_ttl: seconds a NewsAPI response is served without revalidation.
+        :param article_ttl: seconds an article page is served without revalidation.
+        """
         self.api_key = api_key or os.getenv("NEWS_API_KEY")
         self.news_endpoint = "https://newsapi.org/v2/top-headlines"
         if not self.api_key:
             raise ValueError("NEWS_API_KEY is required. Set as an environment variable or pass to the constructor.")
 
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.timeout = (connect_timeout, read_timeout)
+        self.deadline = deadline
+
+        # one keep-alive pool shared by every request this fetcher makes
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=per_host_limit)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        cache = (cache or TieredResponseCache()) if use_cache else None
+        self.http = CachingHttpClient(
+            self.session, cache,
+            ttl_rules={"https://newsapi.org/": news_ttl},
+            default_ttl=article_ttl,
+        ) if cache is not None else None
+
+        # host -> [semaphore, threads holding or waiting on it]; dropped when the last one leaves,
+        # so a long-running scraper does not keep one semaphore per host it ever visited
+        self._host_slots: Dict[str, List] = {}
+        self._host_slots_lock = threading.Lock()
+        self.last_error: Optional[Exception] = None  # failure of the latest news list request, if any
+
+    @contextmanager
+    def _host_slot(self, url: str, timeout: Optional[float] = None) -> Iterator[bool]:
+        """One of the host's `per_host_limit` connections; yields False if none freed up within `timeout`."""
+        host = urlsplit(url).netloc.lower()
+        with self._host_slots_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = [threading.BoundedSemaphore(self.per_host_limit), 0]
+            slot[1] += 1
+        acquired = False
+        try:
+            acquired = slot[0].acquire(timeout=timeout)
+            yield acquired
+        finally:
+            if acquired:
+                slot[0].release()
+            with self._host_slots_lock:
+                slot[1] -= 1
+                if slot[1] == 0:
+                    del self._host_slots[host]
+
+    def _get(self, url: str, params: Optional[Dict[str, object]] = None) -> str:
+        """GET through the response cache when enabled; raises on HTTP errors."""
+        if self.http is not None:
+            return self.http.get(url, params=params, timeout=self.timeout)
+        response = self.session.get(url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.text
+
     def fetch_news_list(self, company_name: str, limit: int = 3) -> List[Dict[str, str]]:
         """
         Fetch top N news articles for the given company from NewsAPI.
@@ -32,75 +108,126 @@ class StockNewsFetcher:
             "sortBy": "popularity",
             "pageSize": limit,
         }
+        self.last_error = None
         try:
-            response = requests.get(self.news_endpoint, params=params)
-            response.raise_for_status()
-            articles = response.json().get("articles", [])
+            articles = json.loads(self._get(self.news_endpoint, params)).get("articles", [])
             return [{"title": a["title"], "url": a["url"]} for a in articles]
         except Exception as e:
+            self.last_error = e
             print(f"[ERROR] Fetching news list failed: {e}")
             return []
 
-    def fetch_article_html(self, url: str) -> Optional[BeautifulSoup]:
+    def fetch_article_text(self, url: str, deadline_at: Optional[float] = None) -> Optional[str]:
         """
-        Fetch raw HTML for a given article URL.
+        Fetch raw HTML text for a given article URL.
 
         :param url: Article URL.
-        :return: BeautifulSoup object or None if failed.
+        :param deadline_at: time.monotonic() after which to give up waiting for a free host connection.
+        :return: HTML string or None if failed.
         """
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            return BeautifulSoup(response.text, "html.parser")
+            wait_for = None if deadline_at is None else max(0.0, deadline_at - time.monotonic())
+            with self._host_slot(url, wait_for) as acquired:
+                if not acquired:
+                    raise TimeoutError("deadline passed while waiting for a connection to the host")
+                return self._get(url)
         except Exception as e:
             print(f"[ERROR] Fetching HTML failed for {url}: {e}")
             return None
 
-    def parse_article(self, soup: BeautifulSoup) -> Dict[str, object]:
+    def fetch_article_html(self, url: str, deadline_at: Optional[float] = None) -> Optional[BeautifulSoup]:
+        """
+        Fetch and parse HTML for a given article URL.
+
+        :param url: Article URL.
+        :param deadline_at: time.monotonic() after which to give up waiting for a free host connection.
+        :return: BeautifulSoup object or None if failed.
+        """
+        html = self.fetch_article_text(url, deadline_at)
+        return BeautifulSoup(html, "html.parser") if html is not None else None
+
+    def parse_article(self, page: Union[str, BeautifulSoup, None]) -> Dict[str, object]:
         """
-        Extract headline, key points, and paragraphs from an article HTML.
+        Extract headline, key points, and paragraphs from an article in one pass,
+        skipping navigation, footers and scripts.
 
-        :param soup: BeautifulSoup object of the article.
+        :param page: Raw HTML (parsed with the fastest installed backend) or a BeautifulSoup object.
         :return: Dictionary with 'headline', 'key_points', and 'paragraphs'.
         """
-        if not soup:
+        if not page:
             return {}
 
         try:
-            headline = soup.find("h1").get_text(strip=True) if soup.find("h1") else ""
-            bullets = [
-                li.get_text(strip=True)
-                for li in soup.find_all("li")
-                if "key points" in li.text.lower() or li.text.startswith("*")
-            ]
-            paragraphs = [p.get_text(strip=True) for p in soup.find_all("p")]
-            return {
-                "headline": headline,
-                "key_points": bullets,
-                "paragraphs": paragraphs,
-            }
+            if isinstance(page, BeautifulSoup):
+                return extract_article_from_soup(page)
+            return extract_article(page)
         except Exception as e:
             print(f"[ERROR] Parsing article failed: {e}")
             return {}
 
-    def get_news_with_content(self, company_name: str, limit: int = 3) -> List[Dict[str, object]]:
+    def _scrape(self, url: str, deadline_at: float) -> Dict[str, object]:
+        parsed_data = self.parse_article(self.fetch_article_text(url, deadline_at))
+        parsed_data["url"] = url
+        return parsed_data
+
+    def _iter_scraped(self, news_list: List[Dict[str, str]],
+                      deadline: Optional[float]) -> Iterator[Tuple[int, Dict[str, object]]]:
+        if not news_list:
+            return
+        deadline = self.deadline if deadline is None else deadline
+        started = time.monotonic()
+        pool = ThreadPoolExecutor(max_workers=min(self.max_workers, len(news_list)), thread_name_prefix="scrape")
+        futures = {
+            pool.submit(self._scrape, item["url"], started + deadline): rank
+            for rank, item in enumerate(news_list)
+        }
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                yield futures[future], future.result()
+        except FuturesTimeout:
+            unfinished = sum(1 for f in futures if not f.done())
+            print(f"[ERROR] Scrape deadline of {deadline}s hit after {time.monotonic() - started:.1f}s; "
+                  f"dropping {unfinished} unfinished articles")
+        finally:
+            # don't wait on hung hosts; their threads end when the read timeout fires
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def iter_news_with_content(self, company_name: str, limit: int = 3,
+                               deadline: Optional[float] = None) -> Iterator[Dict[str, object]]:
         """
-        Full pipeline: fetch top N articles, scrape and parse them.
+        Fetch top N articles and yield each parsed article as soon as it is scraped.
 
         :param company_name: Company name or keyword to search.
         :param limit: Number of articles to fetch.
-        :return: List of parsed article data.
+        :param deadline: Overall seconds to wait for articles; defaults to the fetcher's deadline.
+        :return: Iterator of parsed article data, in completion order.
         """
         news_list = self.fetch_news_list(company_name, limit)
-        results = []
+        for _, parsed_data in self._iter_scraped(news_list, deadline):
+            yield parsed_data
+
+    def get_news_with_content(self, company_name: str, limit: int = 3,
+                              deadline: Optional[float] = None) -> List[Dict[str, object]]:
+        """
+        Full pipeline: fetch top N articles, scrape and parse them concurrently.
+
+        :param company_name: Company name or keyword to search.
+        :param limit: Number of articles to fetch.
+        :param deadline: Overall seconds to wait for articles; defaults to the fetcher's deadline.
+        :return: List of parsed article data, in NewsAPI order. Articles missing the deadline are left out.
+        """
+        return self.scrape_articles(self.fetch_news_list(company_name, limit), deadline)
 
-        for item in news_list:
-            soup = self.fetch_article_html(item["url"])
-            parsed_data = self.parse_article(soup)
-            parsed_data["url"] = item["url"]
-            results.append(parsed_data)
+    def scrape_articles(self, news_list: List[Dict[str, str]], deadline: Optional[float] = None) -> List[Dict[str, object]]:
+        """
+        Scrape and parse an article list from `fetch_news_list` concurrently.
 
-        return results
+        :param news_list: article dicts with 'url'.
+        :param deadline: Overall seconds to wait for articles; defaults to the fetcher's deadline.
+        :return: List of parsed article data, in list order. Articles missing the deadline are left out.
+        """
+        results = sorted(self._iter_scraped(news_list, deadline), key=lambda pair: pair[0])
+        return [parsed_data for _, parsed_data in results]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,375 @@
+## Background prefetch: keeps each watchlist ticker's news index warm so user questions skip fetch/scrape/embed.
+## Run from the project root:  python -m src.news_summarizer.prefetch_scheduler [--once] [--watchlist TSLA,NVDA]
+import sys
+import time
+import random
+import signal
+import argparse
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Sequence, Set
+
+from langchain_core.documents import Document
+from log_utils.custom_logging import CustomLogger
+from exception.custom_exeption import CustomException, root_cause
+from utils.embedding_executor import is_rate_limited
+from utils.metrics import METRICS
+from utils.rate_limiter import TokenBucket
+from src.news_summarizer.summarizer import article_text
+
+_REFRESHES = METRICS.counter("prefetch_refreshes_total", "Watchlist ticker refreshes by status")
+_REFRESH_SECONDS = METRICS.histogram("prefetch_refresh_seconds", "Wall time of one ticker refresh")
+_NEW_CHUNKS = METRICS.counter("prefetch_new_chunks_total", "Chunks embedded by background refreshes")
+
+# cron fields: name, lowest, highest value
+_CRON_FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 6))
+
+
+class IntervalSchedule:
+    """Fixed delay between the end of one cycle and the start of the next."""
+
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError(f"Interval must be positive, got {seconds}")
+        self.seconds = seconds
+
+    def next_after(self, moment: datetime) -> datetime:
+        return moment + timedelta(seconds=self.seconds)
+
+
+class CronSchedule:
+    """
+    Standard 5-field cron expression (minute hour day month weekday; weekday 0 or 7 = Sunday)
+    with `*`, `a-b`, `*/n`, `a-b/n` and comma lists, evaluated in local time.
+    """
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got {expression!r}")
+        self.expression = expression
+        parts[4] = ",".join("0" if p == "7" else p for p in parts[4].split(","))
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse(part, low, high) for part, (_, low, high) in zip(parts, _CRON_FIELDS)
+        )
+        # cron runs when either day field matches if both are restricted
+        self._any_day = parts[2] != "*" and parts[4] != "*"
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for part in field.split(","):
+            span, _, step = part.partition("/")
+            step = int(step) if step else 1
+            if span == "*":
+                start, end = low, high
+            elif "-" in span:
+                start, end = (int(v) for v in span.split("-", 1))
+            else:
+                start = int(span)
+                end = high if step > 1 else start
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Invalid cron field {field!r} (allowed {low}-{high})")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        return (day_ok or weekday_ok) if self._any_day else (day_ok and weekday_ok)
+
+    def next_after(self, moment: datetime) -> datetime:
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 4)  # covers Feb 29
+        while candidate < limit:
+            if candidate.month not in self.months:
+                candidate = (candidate.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression {self.expression!r} never fires")
+
+
+class WatchlistScheduler:
+    """
+    Refreshes every watchlist ticker on a cron or interval schedule: fetch the news list,
+    scrape articles not seen before and ingest them into the ticker's index shard.
+    Tickers start at random offsets within `jitter_seconds` and at most `max_concurrency`
+    refresh at once. NewsAPI requests go through a token bucket, and a 429 from NewsAPI
+    or the embedding provider pauses that provider for `cooldown_seconds`.
+    """
+
+    def __init__(self, watchlist: Sequence[str], schedule=None,
+                 fetcher_factory: Optional[Callable[[], object]] = None,
+                 ingestor_factory: Optional[Callable[[str], object]] = None,
+                 faiss_root: str = "faiss_index", max_concurrency: int = 2, jitter_seconds: float = 60.0,
+                 articles_per_ticker: int = 10, news_per_minute: Optional[float] = None,
+                 cooldown_seconds: float = 60.0, rate_limit_wait: Optional[float] = 300.0,
+                 metrics_path: Optional[str] = None, seed: Optional[int] = None):
+        """
+        :param watchlist: tickers or company names, one index shard each
+        :param schedule: IntervalSchedule or CronSchedule; every 15 minutes when None
+        :param fetcher_factory: () -> StockNewsFetcher; one fetcher is built per worker thread
+        :param ingestor_factory: ticker -> NewsIngestor; defaults to the ticker's shard under `faiss_root`
+        :param max_concurrency: tickers refreshed at once
+        :param jitter_seconds: tickers start at a random offset up to this far into the cycle
+        :param articles_per_ticker: news list size requested per ticker
+        :param news_per_minute: NewsAPI requests per minute across all tickers; unlimited when None
+        :param cooldown_seconds: pause for a provider after it answers 429
+        :param rate_limit_wait: longest wait for a rate-limit slot before the ticker is skipped this cycle
+        :param metrics_path: Prometheus text file rewritten after every cycle
+        :param seed: jitter seed, for reproducible runs
+        """
+        self.log = CustomLogger().get_logger(__name__)
+        try:
+            if not watchlist:
+                raise ValueError("Watchlist is empty")
+            self.watchlist = list(dict.fromkeys(watchlist))
+            self.schedule = schedule or IntervalSchedule(900)
+            self.faiss_root = faiss_root
+            self.fetcher_factory = fetcher_factory or self._default_fetcher
+            self.ingestor_factory = ingestor_factory or self._default_ingestor
+            self.max_concurrency = max(1, max_concurrency)
+            self.jitter_seconds = max(0.0, jitter_seconds)
+            self.articles_per_ticker = articles_per_ticker
+            self.cooldown_seconds = cooldown_seconds
+            self.rate_limit_wait = rate_limit_wait
+            self.metrics_path = metrics_path
+            self.news_limit = TokenBucket(news_per_minute, burst=self.max_concurrency)
+            self.embedding_limit = TokenBucket()  # cooldowns only; EmbeddingExecutor paces the batches
+
+            self.last_cycle_report: Optional[dict] = None
+            self._rng = random.Random(seed)
+            self._stop = threading.Event()
+            self._local = threading.local()
+            self._ingestors: Dict[str, object] = {}
+            self._seen_urls: Dict[str, Set[str]] = {}
+            self._lock = threading.Lock()
+        except Exception as e:
+            self.log.error("Failed to initialize WatchlistScheduler", error=str(e))
+            raise CustomException("Failed to initialize WatchlistScheduler", sys)
+
+    @classmethod
+    def from_config(cls, scheduler_config: Optional[dict], **overrides) -> "WatchlistScheduler":
+        """Build from the `scheduler` block of config.yaml; keyword arguments take precedence."""
+        scheduler_config = scheduler_config or {}
+        rate_limits = scheduler_config.get("rate_limits") or {}
+        cron = overrides.pop("cron", None) or scheduler_config.get("cron")
+        interval = overrides.pop("interval_seconds", None) or scheduler_config.get("interval_seconds", 900)
+        settings = {
+            "watchlist": scheduler_config.get("watchlist") or [],
+            "schedule": CronSchedule(cron) if cron else IntervalSchedule(interval),
+            "faiss_root": scheduler_config.get("faiss_root", "faiss_index"),
+            "max_concurrency": scheduler_config.get("max_concurrency", 2),
+            "jitter_seconds": scheduler_config.get("jitter_seconds", 60.0),
+            "articles_per_ticker": scheduler_config.get("articles_per_ticker", 10),
+            "news_per_minute": rate_limits.get("news_per_minute"),
+            "cooldown_seconds": rate_limits.get("cooldown_seconds", 60.0),
+            "rate_limit_wait": rate_limits.get("max_wait_seconds", 300.0),
+            "metrics_path": scheduler_config.get("metrics_path"),
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    @staticmethod
+    def _default_fetcher():
+        from src.news_summarizer.news_parser import StockNewsFetcher
+        return StockNewsFetcher()
+
+    def _default_ingestor(self, ticker: str):
+        from src.news_summarizer.data_ingestion import NewsIngestor
+        return NewsIngestor(faiss_dir=self.faiss_root, collection=ticker)
+
+    def _fetcher(self):
+        # fetchers keep per-request state (last_error), so each worker thread gets its own
+        fetcher = getattr(self._local, "fetcher", None)
+        if fetcher is None:
+            fetcher = self._local.fetcher = self.fetcher_factory()
+        return fetcher
+
+    def _ingestor(self, ticker: str):
+        with self._lock:
+            if ticker not in self._ingestors:
+                self._ingestors[ticker] = self.ingestor_factory(ticker)
+            return self._ingestors[ticker]
+
+    @staticmethod
+    def _document(ticker: str, article: Dict[str, object]) -> Optional[Document]:
+        text = article_text(article, max_tokens=50_000)
+        if not text:
+            return None
+        return Document(page_content=text, metadata={
+            "source": article.get("url"),
+            "headline": article.get("headline") or "",
+            "ticker": ticker,
+            "fetched_at": datetime.now().isoformat(timespec="seconds"),
+        })
+
+    def refresh(self, ticker: str) -> dict:
+        """
+        Fetch, scrape and ingest one ticker's new articles.
+        :return: dict with ticker, status (ok | unchanged | no_content | rate_limited | failed | stopped),
+                 articles, new_articles, new_chunks, near_duplicates, error and seconds
+        """
+        started = time.perf_counter()
+        result = {"ticker": ticker, "status": "ok", "articles": 0, "new_articles": 0,
+                  "new_chunks": 0, "near_duplicates": 0, "error": None}
+        provider = self.news_limit
+        try:
+            if not self.news_limit.acquire(timeout=self.rate_limit_wait, stop=self._stop):
+                result["status"] = "stopped" if self._stop.is_set() else "rate_limited"
+                return result
+            fetcher = self._fetcher()
+            news_list = fetcher.fetch_news_list(ticker, self.articles_per_ticker)
+            if getattr(fetcher, "last_error", None) is not None:
+                raise fetcher.last_error
+
+            result["articles"] = len(news_list)
+            urls = {item["url"] for item in news_list}
+            with self._lock:
+                seen = self._seen_urls.get(ticker, set()) & urls  # forget articles that left the list
+            fresh = [item for item in news_list if item["url"] not in seen]
+            if not fresh:
+                result["status"] = "unchanged"
+                return result
+
+            documents = [d for d in (self._document(ticker, a) for a in fetcher.scrape_articles(fresh)) if d]
+            if not documents:
+                result["status"] = "no_content"
+                return result
+
+            provider = self.embedding_limit
+            if not self.embedding_limit.acquire(timeout=self.rate_limit_wait, stop=self._stop):
+                result["status"] = "stopped" if self._stop.is_set() else "rate_limited"
+                return result
+            ingestor = self._ingestor(ticker)
+            ingestor.ingest_documents(documents, append=True, skip_near_duplicates=True)
+            report = ingestor.last_ingest_report or {}
+
+            with self._lock:
+                self._seen_urls[ticker] = seen | {d.metadata["source"] for d in documents}
+            result.update(new_articles=len(documents), new_chunks=report.get("new_chunks", 0),
+                          near_duplicates=report.get("near_duplicates", 0))
+            return result
+        except Exception as e:
+            # ingest failures arrive wrapped in one CustomException per layer; report the original error
+            cause = root_cause(e)
+            if is_rate_limited(cause):
+                provider.cooldown(self.cooldown_seconds)
+                result["status"] = "rate_limited"
+            else:
+                result["status"] = "failed"
+            result["error"] = f"{type(cause).__name__}: {cause}"
+            return result
+        finally:
+            result["seconds"] = round(time.perf_counter() - started, 3)
+            _REFRESHES.inc(1, {"status": result["status"]})
+            _REFRESH_SECONDS.observe(result["seconds"])
+            _NEW_CHUNKS.inc(result["new_chunks"])
+            if result["status"] in ("failed", "rate_limited"):
+                self.log.warning("Ticker refresh did not complete", **result)
+            else:
+                self.log.info("Ticker refreshed", **result)
+
+    def run_cycle(self) -> dict:
+        """
+        Refresh every ticker once, each started at its jittered offset, `max_concurrency` at a time.
+        :return: cycle report, also kept as `last_cycle_report`
+        """
+        started = time.perf_counter()
+        offsets = sorted((self._rng.uniform(0, self.jitter_seconds), ticker) for ticker in self.watchlist)
+        results: Dict[str, dict] = {}
+        pool = ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(self.watchlist)),
+                                  thread_name_prefix="prefetch")
+        futures = {}
+        try:
+            for offset, ticker in offsets:
+                if self._stop.wait(max(0.0, started + offset - time.perf_counter())):
+                    break
+                futures[pool.submit(self.refresh, ticker)] = ticker
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        statuses: Dict[str, int] = {}
+        for result in results.values():
+            statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+        report = {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "seconds": round(time.perf_counter() - started, 3),
+            "statuses": statuses,
+            "new_chunks": sum(r["new_chunks"] for r in results.values()),
+            "tickers": results,
+        }
+        self.last_cycle_report = report
+        self.log.info("Prefetch cycle completed", tickers=len(results), seconds=report["seconds"],
+                      new_chunks=report["new_chunks"], **statuses)
+        if self.metrics_path:
+            METRICS.write_prometheus(self.metrics_path)
+        return report
+
+    def run(self, max_cycles: Optional[int] = None, run_immediately: bool = True) -> None:
+        """
+        Run cycles on the schedule until `stop()` is called (or `max_cycles` have run).
+        :param run_immediately: start the first cycle now instead of at the first scheduled time
+        """
+        cycles = 0
+        next_run = datetime.now() if run_immediately else self.schedule.next_after(datetime.now())
+        self.log.info("Prefetch scheduler started", watchlist=self.watchlist, next_run=next_run.isoformat())
+        while not self._stop.is_set():
+            delay = (next_run - datetime.now()).total_seconds()
+            if delay > 0 and self._stop.wait(delay):
+                break
+            self.run_cycle()
+            cycles += 1
+            if max_cycles is not None and cycles >= max_cycles:
+                break
+            next_run = self.schedule.next_after(datetime.now())
+        self.log.info("Prefetch scheduler stopped", cycles=cycles)
+
+    def start(self, run_immediately: bool = True) -> threading.Thread:
+        """Run the scheduler on a daemon thread inside the current process (e.g. the web app)."""
+        thread = threading.Thread(target=self.run, kwargs={"run_immediately": run_immediately},
+                                  name="prefetch-scheduler", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        """Stop after the refreshes already running; waits for rate-limit slots are abandoned."""
+        self._stop.set()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Keep the watchlist's news indexes warm in the background.")
+    parser.add_argument("--watchlist", help="comma-separated tickers; overrides scheduler.watchlist")
+    parser.add_argument("--interval", type=float, help="seconds between cycles; overrides the configured schedule")
+    parser.add_argument("--cron", help="5-field cron expression; overrides the configured schedule")
+    parser.add_argument("--once", action="store_true", help="run one cycle and exit")
+    args = parser.parse_args(argv)
+
+    from utils.model_loader import ModelLoader
+    overrides = {}
+    if args.watchlist:
+        overrides["watchlist"] = [t.strip() for t in args.watchlist.split(",") if t.strip()]
+    if args.cron:
+        overrides["cron"] = args.cron
+    elif args.interval:
+        overrides["schedule"] = IntervalSchedule(args.interval)
+    if args.once:
+        overrides["jitter_seconds"] = 0.0
+    scheduler = WatchlistScheduler.from_config(ModelLoader().config.get("scheduler"), **overrides)
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: scheduler.stop())
+    scheduler.run(max_cycles=1 if args.once else None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+import time
+import threading
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.callbacks.manager import dispatch_custom_event
+from langchain_core.runnables import RunnableConfig
+from log_utils.custom_logging import CustomLogger
+from utils.metrics import METRICS
+from utils.tokens import estimate_tokens
+
+# run names given to the chain's steps; runs with any other name are not timed as a stage
+STAGES = ("rewrite", "embed_query", "retrieve", "format_docs", "generate")
+CACHE_EVENT = "rag_cache"
+
+_STAGE_SECONDS = METRICS.histogram("rag_stage_seconds", "Wall time of each RAG chain stage")
+_TURN_SECONDS = METRICS.histogram("rag_turn_seconds", "Wall time of a whole chat turn")
+_FIRST_TOKEN_SECONDS = METRICS.histogram("rag_first_token_seconds", "Turn start to first streamed answer token")
+_RETRIEVED_DOCS = METRICS.histogram("rag_retrieved_docs", "Chunks retrieved per turn", buckets=(0, 1, 2, 3, 5, 8, 13, 21))
+_TOKENS = METRICS.counter("rag_tokens_total", "LLM tokens by kind (prompt / completion)")
+_CACHE_EVENTS = METRICS.counter("rag_cache_events_total", "Cache lookups by cache and result")
+_TURNS = METRICS.counter("rag_turns_total", "Chat turns by status")
+
+
+def trace_cache(config: Optional[RunnableConfig], cache: str, result: str) -> None:
+    """Report a cache lookup from inside a chain step to the turn's tracer (no-op outside a run)."""
+    try:
+        dispatch_custom_event(CACHE_EVENT, {"cache": cache, "result": result}, config=config)
+    except RuntimeError:
+        pass  # called outside a traced run
+
+
+class RAGTurnTracer(BaseCallbackHandler):
+    """
+    Callback handler for one chat turn: wall time per stage, retrieved-doc count,
+    prompt/completion tokens and cache events. `finish` logs them as one structured
+    event and records them in the process metrics registry.
+    """
+
+    def __init__(self, session_id: str):
+        self.log = CustomLogger().get_logger(__name__)
+        self.session_id = session_id
+        self.started = time.perf_counter()
+        self.stage_seconds: Dict[str, float] = {}
+        self.retrieved_docs = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.tokens_estimated = False
+        self.llm_calls = 0
+        self.first_token_seconds: Optional[float] = None
+        self.cache_events: List[Dict[str, str]] = []
+        self._open: Dict[UUID, tuple] = {}
+        self._nested: Dict[UUID, float] = {}  # open stage -> seconds spent in stages nested inside it
+        self._prompt_estimates: Dict[UUID, int] = {}
+        self._lock = threading.Lock()  # parallel branches report from worker threads
+        self._trace: Optional[dict] = None
+
+    def _start(self, run_id: UUID, name: Optional[str]) -> None:
+        if name in STAGES:
+            with self._lock:
+                self._open[run_id] = (name, time.perf_counter())
+
+    def _end(self, run_id: UUID, parent_run_id: Optional[UUID] = None) -> Optional[str]:
+        """Close a stage; its time excludes stages nested in it (embed_query inside retrieve)."""
+        with self._lock:
+            opened = self._open.pop(run_id, None)
+            if opened is None:
+                return None
+            stage, started = opened
+            elapsed = time.perf_counter() - started
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + elapsed - self._nested.pop(run_id, 0.0)
+            if parent_run_id in self._open:
+                self._nested[parent_run_id] = self._nested.get(parent_run_id, 0.0) + elapsed
+            return stage
+
+    def _count_docs(self, docs: Any) -> None:
+        if isinstance(docs, dict):
+            docs = docs.get("output")
+        if isinstance(docs, list):
+            with self._lock:
+                self.retrieved_docs += len(docs)
+
+    # chains: rewrite, embed_query, format_docs
+    def on_chain_start(self, serialized, inputs, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, kwargs.get("name"))
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs: Any) -> None:
+        if self._end(run_id, kwargs.get("parent_run_id")) == "retrieve":
+            self._count_docs(outputs)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, kwargs.get("parent_run_id"))
+
+    # retrieve; a vector-store retriever runs embed_query as a nested chain
+    def on_retriever_start(self, serialized, query: str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, kwargs.get("name"))
+
+    def on_retriever_end(self, documents, *, run_id: UUID, **kwargs: Any) -> None:
+        if self._end(run_id) == "retrieve":
+            self._count_docs(list(documents))
+
+    def on_retriever_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    # LLM calls: generate is a stage; every call (rewrite included) counts tokens
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, kwargs.get("name"))
+        estimate = sum(estimate_tokens(str(m.content)) for batch in messages for m in batch)
+        with self._lock:
+            self._prompt_estimates[run_id] = estimate
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, kwargs.get("name"))
+        with self._lock:
+            self._prompt_estimates[run_id] = sum(estimate_tokens(p) for p in prompts)
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            opened = self._open.get(run_id)
+            if opened and opened[0] == "generate" and self.first_token_seconds is None:
+                self.first_token_seconds = time.perf_counter() - self.started
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+        prompt, completion = self._usage(response)
+        with self._lock:
+            estimate = self._prompt_estimates.pop(run_id, 0)
+            if prompt is None:
+                # provider reported no usage: fall back to the chars/4 estimate
+                prompt = estimate
+                completion = sum(estimate_tokens(g.text) for batch in response.generations for g in batch)
+                self.tokens_estimated = True
+            self.prompt_tokens += prompt
+            self.completion_tokens += completion
+            self.llm_calls += 1
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+        with self._lock:
+            self._prompt_estimates.pop(run_id, None)
+
+    @staticmethod
+    def _usage(response) -> tuple:
+        """(prompt, completion) tokens as reported by the provider, or (None, None)."""
+        prompt = completion = 0
+        reported = False
+        for batch in response.generations:
+            for generation in batch:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    prompt += usage.get("input_tokens", 0)
+                    completion += usage.get("output_tokens", 0)
+                    reported = True
+        if not reported:
+            token_usage = (response.llm_output or {}).get("token_usage") or {}
+            if token_usage:
+                return token_usage.get("prompt_tokens", 0), token_usage.get("completion_tokens", 0)
+            return None, None
+        return prompt, completion
+
+    def on_custom_event(self, name: str, data: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        if name == CACHE_EVENT:
+            with self._lock:
+                self.cache_events.append({"cache": data["cache"], "result": data["result"]})
+
+    def finish(self, error: Optional[BaseException] = None, cancelled: bool = False) -> dict:
+        """
+        Close the turn: log one structured event and record the metrics. Later calls
+        return the same trace without recording again.
+        :param error: the turn failed with this error
+        :param cancelled: the caller stopped the turn early, e.g. abandoned a stream
+        :return: the turn's trace as a dict
+        """
+        if self._trace is not None:
+            return self._trace
+        total = time.perf_counter() - self.started
+        status = "error" if error is not None else "cancelled" if cancelled else "ok"
+        with self._lock:
+            trace = {
+                "session_id": self.session_id,
+                "status": status,
+                "total_ms": round(total * 1000, 2),
+                "stages_ms": {stage: round(s * 1000, 2) for stage, s in self.stage_seconds.items()},
+                "first_token_ms": None if self.first_token_seconds is None else round(self.first_token_seconds * 1000, 2),
+                "retrieved_docs": self.retrieved_docs,
+                "llm_calls": self.llm_calls,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "tokens_estimated": self.tokens_estimated,
+                "cache": list(self.cache_events),
+            }
+
+        for stage, seconds in self.stage_seconds.items():
+            _STAGE_SECONDS.observe(seconds, {"stage": stage})
+        _TURN_SECONDS.observe(total, {"status": status})
+        if self.first_token_seconds is not None:
+            _FIRST_TOKEN_SECONDS.observe(self.first_token_seconds)
+        if "retrieve" in self.stage_seconds:
+            _RETRIEVED_DOCS.observe(self.retrieved_docs)
+        _TOKENS.inc(self.prompt_tokens, {"kind": "prompt"})
+        _TOKENS.inc(self.completion_tokens, {"kind": "completion"})
+        for event in trace["cache"]:
+            _CACHE_EVENTS.inc(1, event)
+        _TURNS.inc(1, {"status": status})
+
+        if error is not None:
+            self.log.warning("RAG turn traced", error=str(error), **trace)
+        else:
+            self.log.info("RAG turn traced", **trace)
+        self._trace = trace
+        return trace
@@ -0,0 +1,113 @@
+import sys
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from log_utils.custom_logging import CustomLogger
+from exception.custom_exeption import CustomException
+from utils.lru_cache import LRUCache
+from src.news_summarizer.index_store import index_dir_of, read_index_version
+from src.news_summarizer.shard_manager import ShardedRetriever, shard_name
+
+IndexScope = Tuple[Tuple[str, Optional[str]], ...]  # sorted (index, version) pairs
+
+
+class SemanticAnswerCache:
+    """
+    Opt-in answer cache for ConversationalRAG. A question whose embedding is within
+    `threshold` cosine similarity of a cached one gets the cached answer, as long as it
+    was answered from the same indexes at the same versions. One cache can be shared by
+    sessions over different shards: a TSLA answer is never served to an NVDA session,
+    and a save to either shard retires its answers.
+    """
+
+    def __init__(self, embeddings: Embeddings, index_dir: str = "faiss_index",
+                 threshold: float = 0.95, ttl: float = 600.0, max_entries: int = 512):
+        """
+        :param embeddings: model used to embed the standalone question
+        :param index_dir: FAISS directory of unsharded retrievers whose store was not opened through FaissIndexStore
+        :param threshold: minimum cosine similarity to count as the same question
+        :param ttl: seconds an answer may be served
+        :param max_entries: answers kept; least recently used are evicted
+        """
+        self.log = CustomLogger().get_logger(__name__)
+        self.embeddings = embeddings
+        self.index_dir = index_dir
+        self.threshold = threshold
+        self._entries = LRUCache(maxsize=max_entries, ttl=ttl)
+        self._next_key = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def scope(self, retriever=None) -> IndexScope:
+        """
+        Indexes `retriever` reads, with their current versions: every queried shard for a
+        ShardedRetriever, else the directory its vector store was opened from (`index_dir` if unknown).
+        """
+        if isinstance(retriever, ShardedRetriever):
+            manager = retriever.manager
+            names = {shard_name(c) for c in retriever.collections} if retriever.collections else manager.collections()
+            return tuple(sorted((name, read_index_version(str(Path(manager.faiss_root) / name))) for name in names))
+        index_dir = index_dir_of(getattr(retriever, "vectorstore", None)) or str(self.index_dir)
+        return ((index_dir, read_index_version(index_dir)),)
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def lookup(self, question: str, retriever=None) -> Tuple[Optional[str], tuple]:
+        """
+        :param question: standalone (rewritten) question
+        :param retriever: retriever the answer is generated from; scopes the match, see `scope`
+        :return: (cached answer or None, key to pass to `store` along with a freshly generated answer)
+        """
+        try:
+            scope = self.scope(retriever)
+            query = self._normalize(self.embeddings.embed_query(question))
+
+            best_score, best_answer, best_key = -1.0, None, None
+            for entry_key, (vector, answer, entry_scope) in self._entries.items():
+                if entry_scope != scope:
+                    continue
+                score = float(np.dot(vector, query))
+                if score > best_score:
+                    best_score, best_answer, best_key = score, answer, entry_key
+
+            key = (query, scope, retriever)
+            if best_answer is not None and best_score >= self.threshold:
+                self._entries.get(best_key)  # mark as recently used, so eviction is LRU rather than FIFO
+                with self._lock:
+                    self.hits += 1
+                self.log.info("Semantic cache hit", similarity=round(best_score, 4))
+                return best_answer, key
+            with self._lock:
+                self.misses += 1
+            return None, key
+        except Exception as e:
+            self.log.error("Semantic cache lookup failed", error=str(e))
+            raise CustomException("Semantic cache lookup failed", sys)
+
+    def store(self, key: tuple, answer: str) -> None:
+        """
+        Cache an answer under the key returned by `lookup`.
+        Dropped if one of its indexes was rewritten while the answer was being generated.
+        """
+        query_embedding, scope, retriever = key
+        if not answer or scope != self.scope(retriever):
+            return
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+        self._entries.put(key, (query_embedding, answer, scope))
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {"hits": hits, "misses": misses, "entries": len(self._entries),
+                "hit_rate": hits / total if total else None}
@@ -0,0 +1,156 @@
+import re
+import sys
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+from log_utils.custom_logging import CustomLogger
+from exception.custom_exeption import CustomException
+from utils.lru_cache import LRUCache
+from src.news_summarizer.index_factory import IndexFactory
+from src.news_summarizer.index_store import FaissIndexStore, read_index_version
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def shard_name(collection: str) -> str:
+    """Directory name for a ticker or collection: 'BRK.B' -> 'brk.b', 'Tesla Inc' -> 'tesla_inc'."""
+    name = _UNSAFE.sub("_", collection.strip()).strip("._").lower()
+    if not name:
+        raise ValueError(f"Invalid collection name: {collection!r}")
+    return name
+
+
+def shard_dir(faiss_root: str, collection: str) -> Path:
+    """Index directory of one collection under the shared FAISS root."""
+    return Path(faiss_root) / shard_name(collection)
+
+
+def list_shards(faiss_root: str) -> List[str]:
+    """Collections with a saved index under `faiss_root`."""
+    root = Path(faiss_root)
+    if not root.is_dir():
+        return []
+    return sorted(p.name for p in root.iterdir()
+                  if p.is_dir() and not p.name.startswith(".") and read_index_version(str(p)) is not None)
+
+
+class ShardManager:
+    """
+    Keeps the `max_loaded` most recently queried collection indexes open (read-only,
+    memory-mapped) and fans queries out across them. A shard is reopened when a save
+    changes its version.
+    """
+
+    def __init__(self, faiss_root: str = "faiss_index", embeddings=None, index_factory=None,
+                 max_loaded: int = 8, search_workers: int = 4):
+        """
+        :param faiss_root: directory holding one sub-directory per collection
+        :param embeddings: query embedding model; loaded from config when None
+        :param index_factory: IndexFactory whose query-time settings are applied on open
+        :param max_loaded: shards kept open; the least recently used is closed beyond this
+        :param search_workers: shards searched in parallel by one query
+        """
+        try:
+            self.log = CustomLogger().get_logger(__name__)
+            self.faiss_root = Path(faiss_root)
+            if embeddings is None:
+                from utils.model_loader import ModelLoader
+                embeddings = ModelLoader().load_embedding_model()
+            self.embeddings = embeddings
+            self.index_factory = index_factory
+            self.search_workers = search_workers
+            self._shards = LRUCache(maxsize=max_loaded)
+            self._lock = threading.Lock()
+        except Exception as e:
+            self.log.error("Failed to initialize ShardManager", error=str(e))
+            raise CustomException("Failed to initialize ShardManager", sys)
+
+    @classmethod
+    def from_config(cls, faiss_config: Optional[dict], faiss_root: str = "faiss_index", embeddings=None) -> "ShardManager":
+        """Build from the `faiss_db` block of config.yaml."""
+        shard_config = (faiss_config or {}).get("shards") or {}
+        return cls(
+            faiss_root=faiss_root,
+            embeddings=embeddings,
+            index_factory=IndexFactory.from_config(faiss_config),
+            max_loaded=shard_config.get("max_loaded", 8),
+            search_workers=shard_config.get("search_workers", 4),
+        )
+
+    def collections(self) -> List[str]:
+        return list_shards(str(self.faiss_root))
+
+    def get(self, collection: str):
+        """
+        Open (or reuse) one collection's store.
+        :return: read-only FAISS store, or None when the collection has no saved index
+        """
+        name = shard_name(collection)
+        path = self.faiss_root / name
+        version = read_index_version(str(path))
+        with self._lock:
+            cached = self._shards.get(name)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            vector_store = FaissIndexStore(str(path), self.embeddings, self.index_factory).open_readonly()
+            if vector_store is None:
+                self._shards.pop(name)
+                return None
+            self._shards.put(name, (version, vector_store))
+            self.log.info("Shard opened", collection=name, vectors=vector_store.index.ntotal, open_shards=len(self._shards))
+            return vector_store
+
+    def search(self, query: str, collections: Optional[Sequence[str]] = None, k: int = 5) -> List[Document]:
+        """
+        Top-k chunks across the given collections (all saved ones when None). The query is
+        embedded once; each shard returns its own top-k and the lists are merged by distance.
+        Each document's metadata gets its `collection`.
+        """
+        names = [shard_name(c) for c in collections] if collections else self.collections()
+        if not names:
+            return []
+        vector = self.embeddings.embed_query(query)
+
+        def search_shard(name: str) -> List[Tuple[float, str, Document]]:
+            vector_store = self.get(name)
+            if vector_store is None:
+                return []
+            hits = vector_store.similarity_search_with_score_by_vector(vector, k=k)
+            results = []
+            for doc, score in hits:
+                doc.metadata["collection"] = name
+                results.append((float(score), name, doc))
+            return results
+
+        if len(names) == 1:
+            per_shard = [search_shard(names[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.search_workers, len(names))) as pool:
+                per_shard = list(pool.map(search_shard, names))
+        # every shard uses the same L2 metric, so raw distances are comparable
+        merged = heapq.nsmallest(k, (hit for hits in per_shard for hit in hits), key=lambda hit: hit[0])
+        return [doc for _, _, doc in merged]
+
+    def retriever(self, collections: Optional[Sequence[str]] = None, k: int = 5) -> "ShardedRetriever":
+        """Retriever over the given collections, for ConversationalRAG."""
+        return ShardedRetriever(manager=self, collections=list(collections) if collections else None, k=k)
+
+
+class ShardedRetriever(BaseRetriever):
+    """Retriever that queries one or more collection shards through a ShardManager."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    manager: ShardManager
+    collections: Optional[List[str]] = None
+    k: int = 5
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.manager.search(query, self.collections, self.k)
@@ -0,0 +1,123 @@
+import json
+import sqlite3
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, Tuple, Union
+
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+
+DOCSTORE_FILE = "docstore.sqlite"
+
+_SCHEMA = (
+    "CREATE TABLE docs (id TEXT PRIMARY KEY, page_content TEXT NOT NULL, metadata TEXT NOT NULL)",
+    "CREATE TABLE id_map (position INTEGER PRIMARY KEY, doc_id TEXT NOT NULL)",
+)
+
+
+def write_docstore(path: str, docstore: Docstore, index_to_docstore_id: Mapping, batch_size: int = 2000) -> None:
+    """
+    Write every document referenced by `index_to_docstore_id`, plus the mapping itself,
+    to a new SQLite file at `path`.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        rows, positions = [], []
+        for position, doc_id in sorted(index_to_docstore_id.items()):
+            doc = docstore.search(doc_id)
+            if isinstance(doc, Document):
+                rows.append((doc_id, doc.page_content, json.dumps(doc.metadata, default=str)))
+            positions.append((int(position), doc_id))
+            if len(positions) >= batch_size:
+                conn.executemany("INSERT OR REPLACE INTO docs VALUES (?, ?, ?)", rows)
+                conn.executemany("INSERT INTO id_map VALUES (?, ?)", positions)
+                rows, positions = [], []
+        conn.executemany("INSERT OR REPLACE INTO docs VALUES (?, ?, ?)", rows)
+        conn.executemany("INSERT INTO id_map VALUES (?, ?)", positions)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def read_docstore(path: str) -> Tuple[InMemoryDocstore, Dict[int, str]]:
+    """Load a docstore file fully into memory, for the ingestion side that edits it."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        docs = {
+            doc_id: Document(id=doc_id, page_content=page_content, metadata=json.loads(metadata))
+            for doc_id, page_content, metadata in conn.execute("SELECT id, page_content, metadata FROM docs")
+        }
+        mapping = dict(conn.execute("SELECT position, doc_id FROM id_map"))
+    finally:
+        conn.close()
+    return InMemoryDocstore(docs), mapping
+
+
+class _ReadOnlyConnection:
+    """One read-only connection shared by threads; lookups are short, so a lock is enough."""
+
+    def __init__(self, path: str):
+        # the file is never written after the atomic save that created it
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+        self.lock = threading.Lock()
+
+    def fetchone(self, sql: str, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def fetchall(self, sql: str, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+
+class SQLiteDocstore(Docstore):
+    """Random-access, read-only docstore: one row fetched per retrieved chunk, nothing loaded up front."""
+
+    def __init__(self, connection: _ReadOnlyConnection):
+        self._connection = connection
+
+    def search(self, search: str) -> Union[str, Document]:
+        row = self._connection.fetchone("SELECT page_content, metadata FROM docs WHERE id = ?", (search,))
+        if row is None:
+            return f"ID {search} not found."
+        return Document(id=search, page_content=row[0], metadata=json.loads(row[1]))
+
+
+class SQLiteIdMap(Mapping):
+    """Read-only FAISS position -> docstore id mapping, looked up on demand."""
+
+    def __init__(self, connection: _ReadOnlyConnection):
+        self._connection = connection
+        self._len = None
+
+    def __getitem__(self, position) -> str:
+        row = self._connection.fetchone("SELECT doc_id FROM id_map WHERE position = ?", (int(position),))
+        if row is None:
+            raise KeyError(position)
+        return row[0]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter([row[0] for row in self._connection.fetchall("SELECT position FROM id_map ORDER BY position")])
+
+    def __len__(self) -> int:
+        if self._len is None:
+            self._len = self._connection.fetchone("SELECT COUNT(*) FROM id_map")[0]
+        return self._len
+
+    def items(self):
+        return self._connection.fetchall("SELECT position, doc_id FROM id_map ORDER BY position")
+
+    def values(self):
+        return [row[0] for row in self._connection.fetchall("SELECT doc_id FROM id_map ORDER BY position")]
+
+
+def open_docstore(path: str) -> Tuple[SQLiteDocstore, SQLiteIdMap]:
+    """Open a docstore file for random-access reads."""
+    if not Path(path).exists():
+        raise FileNotFoundError(path)
+    connection = _ReadOnlyConnection(path)
+    return SQLiteDocstore(connection), SQLiteIdMap(connection)
@@ -0,0 +1,216 @@
+import sys
+import time
+import hashlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.output_parsers import StrOutputParser
+from log_utils.custom_logging import CustomLogger
+from exception.custom_exeption import CustomException
+from utils.model_loader import ModelLoader
+from utils.sqlite_lru import SQLiteLRUCache
+from prompts.prompt_library import document_summarize_prompt, news_digest_prompt
+
+SUMMARY_FORMAT_INSTRUCTIONS = (
+    "Reply with 3 to 5 bullet points of at most 30 words each. Keep tickers, figures and dates. "
+    "If nothing in the article matters to investors, reply with 'No market-relevant content.'"
+)
+
+
+def article_text(article: Dict[str, object], max_tokens: int = 3000) -> str:
+    """Headline, key points and paragraphs of a parsed article, cut to about `max_tokens`."""
+    parts = [article.get("headline") or ""] + list(article.get("key_points") or []) + list(article.get("paragraphs") or [])
+    text = "\n".join(p.strip() for p in parts if p and p.strip())
+    return text[:max_tokens * 4]  # same chars-per-token ratio as utils.tokens.estimate_tokens
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """
+    SQLite cache of LLM summaries keyed by a content hash. The least recently used rows
+    are evicted past `max_entries`.
+    """
+
+    def __init__(self, cache_path: str = "data/summary_cache.sqlite", max_entries: int = 20_000):
+        self.max_entries = max_entries
+        self._store = SQLiteLRUCache(cache_path, "summaries", max_entries, name="summary")
+
+    def get(self, key: str) -> Optional[str]:
+        return self._store.get(key)
+
+    def put(self, key: str, summary: str) -> None:
+        self._store.put(key, summary)
+
+
+class NewsSummarizer:
+    """
+    Map-reduce summarizer for `StockNewsFetcher.get_news_with_content` output: each
+    article is summarized with `document_summarize_prompt` (map, requests in parallel),
+    then the summaries are merged into one digest with `news_digest_prompt` (reduce).
+    Both steps are cached by content hash, so a refresh only summarizes new articles and
+    an unchanged set of articles costs no LLM call at all.
+    """
+
+    def __init__(self, llm=None, cache: Optional[SummaryCache] = None,
+                 max_concurrency: Optional[int] = None, max_article_tokens: Optional[int] = None):
+        """
+        :param llm: chat model; the configured one when None
+        :param cache: summary cache; built from the `summarizer.cache` config block when None
+        :param max_concurrency: article summaries requested at once
+        :param max_article_tokens: article text sent to the summary prompt is cut past this
+        """
+        self.log = CustomLogger().get_logger(__name__)
+        try:
+            self.model_loader = ModelLoader()
+            summarizer_config = self.model_loader.config.get("summarizer") or {}
+            cache_config = summarizer_config.get("cache") or {}
+            self.max_concurrency = max(1, max_concurrency or summarizer_config.get("max_concurrency", 8))
+            self.max_article_tokens = max_article_tokens or summarizer_config.get("max_article_tokens", 3000)
+            if cache is None and cache_config.get("enabled", False):
+                cache = SummaryCache(cache_config.get("path", "data/summary_cache.sqlite"),
+                                     cache_config.get("max_entries", 20_000))
+            self.cache = cache
+            self.llm = llm if llm is not None else self.model_loader.load_llm("google")
+
+            self.map_chain = (
+                document_summarize_prompt.partial(format_instructions=SUMMARY_FORMAT_INSTRUCTIONS)
+                | self.llm
+                | StrOutputParser()
+            ).with_config(run_name="summarize_article")
+            self.reduce_chain = (news_digest_prompt | self.llm | StrOutputParser()).with_config(run_name="news_digest")
+
+            # a different model or prompt must not serve summaries written by the old one
+            model = getattr(self.llm, "model", None) or getattr(self.llm, "model_name", None) or type(self.llm).__name__
+            self._map_scope = _sha256(f"{model}|{document_summarize_prompt.pretty_repr()}|{SUMMARY_FORMAT_INSTRUCTIONS}")
+            self._reduce_scope = _sha256(f"{model}|{news_digest_prompt.pretty_repr()}")
+        except Exception as e:
+            self.log.error("Failed to initialize NewsSummarizer", error=str(e))
+            raise CustomException("Failed to initialize NewsSummarizer", sys)
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        return self.cache.get(key) if self.cache is not None else None
+
+    def _cache_put(self, key: str, summary: str) -> None:
+        if self.cache is not None:
+            self.cache.put(key, summary)
+
+    def _plan(self, articles: Sequence[Dict[str, object]]) -> Tuple[List[dict], List[dict]]:
+        """(one entry per non-empty article with any cached summary filled in, entries still to summarize)"""
+        entries = []
+        for article in articles:
+            text = article_text(article, self.max_article_tokens)
+            if not text:
+                continue
+            key = _sha256(f"map|{self._map_scope}|{text}")
+            summary = self._cache_get(key)
+            entries.append({"url": article.get("url"), "headline": article.get("headline") or "",
+                            "summary": summary, "cached": summary is not None, "error": None,
+                            "key": key, "text": text})
+        return entries, [entry for entry in entries if entry["summary"] is None]
+
+    def _collect(self, entries: List[dict], missing: List[dict], outputs: list) -> List[dict]:
+        for entry, output in zip(missing, outputs):
+            if isinstance(output, Exception):
+                entry["error"] = f"{type(output).__name__}: {output}"
+                self.log.warning("Article summary failed", url=entry["url"], error=entry["error"])
+            else:
+                entry["summary"] = output
+                self._cache_put(entry["key"], output)
+        return [{k: v for k, v in entry.items() if k != "text"} for entry in entries]
+
+    def _map_config(self) -> dict:
+        return {"max_concurrency": self.max_concurrency}
+
+    def summarize_articles(self, articles: Sequence[Dict[str, object]]) -> List[dict]:
+        """
+        Summarize each article (map step); cached summaries are reused, the rest are requested in parallel.
+        A failed article gets `error` set and no summary.
+        :param articles: parsed articles with headline, key_points, paragraphs and url
+        :return: one dict per non-empty article: url, headline, summary, cached, error, key
+        """
+        entries, missing = self._plan(articles)
+        outputs = self.map_chain.batch([{"document_text": e["text"]} for e in missing],
+                                       config=self._map_config(), return_exceptions=True) if missing else []
+        return self._collect(entries, missing, outputs)
+
+    async def asummarize_articles(self, articles: Sequence[Dict[str, object]]) -> List[dict]:
+        """Async version of `summarize_articles`."""
+        entries, missing = self._plan(articles)
+        outputs = await self.map_chain.abatch([{"document_text": e["text"]} for e in missing],
+                                              config=self._map_config(), return_exceptions=True) if missing else []
+        return self._collect(entries, missing, outputs)
+
+    def _reduce_input(self, company: str, summaries: List[dict]) -> Tuple[str, dict]:
+        # key on the set of summaries, so a reshuffled ranking of the same articles still hits
+        key = _sha256(f"reduce|{self._reduce_scope}|{company}|" + "|".join(sorted(s["key"] for s in summaries)))
+        text = "\n\n".join(f"[{i}] {s['headline']} ({s['url']})\n{s['summary']}" for i, s in enumerate(summaries, 1))
+        return key, {"company": company, "summaries": text}
+
+    def _report(self, company: str, digest: Optional[str], summaries: List[dict],
+                digest_cached: bool, started: float) -> dict:
+        report = {
+            "company": company,
+            "digest": digest,
+            "articles": summaries,
+            "stats": {
+                "articles": len(summaries),
+                "summarized": sum(1 for s in summaries if not s["cached"] and s["summary"] is not None),
+                "cached_summaries": sum(1 for s in summaries if s["cached"]),
+                "failed": sum(1 for s in summaries if s["error"] is not None),
+                "digest_cached": digest_cached,
+                "seconds": round(time.perf_counter() - started, 3),
+            },
+        }
+        self.log.info("News digest built", company=company, **report["stats"])
+        return report
+
+    def digest(self, company: str, articles: Sequence[Dict[str, object]]) -> dict:
+        """
+        Map-reduce digest of one company's articles.
+        :param company: company or ticker the articles are about
+        :param articles: output of `StockNewsFetcher.get_news_with_content`
+        :return: dict with company, digest (None when no article could be summarized), articles and stats
+        """
+        try:
+            started = time.perf_counter()
+            summaries = self.summarize_articles(articles)
+            ready = [s for s in summaries if s["summary"] is not None]
+            if not ready:
+                return self._report(company, None, summaries, False, started)
+            key, reduce_input = self._reduce_input(company, ready)
+            digest = self._cache_get(key)
+            digest_cached = digest is not None
+            if digest is None:
+                digest = self.reduce_chain.invoke(reduce_input)
+                self._cache_put(key, digest)
+            return self._report(company, digest, summaries, digest_cached, started)
+        except Exception as e:
+            self.log.error("Failed to build news digest", company=company, error=str(e))
+            raise CustomException("Failed to build news digest", sys)
+
+    async def adigest(self, company: str, articles: Sequence[Dict[str, object]]) -> dict:
+        """Async version of `digest`."""
+        try:
+            started = time.perf_counter()
+            summaries = await self.asummarize_articles(articles)
+            ready = [s for s in summaries if s["summary"] is not None]
+            if not ready:
+                return self._report(company, None, summaries, False, started)
+            key, reduce_input = self._reduce_input(company, ready)
+            digest = self._cache_get(key)
+            digest_cached = digest is not None
+            if digest is None:
+                digest = await self.reduce_chain.ainvoke(reduce_input)
+                self._cache_put(key, digest)
+            return self._report(company, digest, summaries, digest_cached, started)
+        except Exception as e:
+            self.log.error("Failed to build news digest", company=company, error=str(e))
+            raise CustomException("Failed to build news digest", sys)
+
+
+def summarize_company(fetcher, company: str, limit: int = 10, summarizer: Optional[NewsSummarizer] = None) -> dict:
+    """Fetch and scrape `limit` articles about `company` with a StockNewsFetcher and return their digest."""
+    articles = fetcher.get_news_with_content(company, limit=limit)
+    return (summarizer or NewsSummarizer()).digest(company, articles)
@@ -0,0 +1,91 @@
+import threading
+import hashlib
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+from log_utils.custom_logging import CustomLogger
+from utils.sqlite_lru import SQLiteLRUCache
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps any LangChain `Embeddings` with a SQLite cache keyed by (model_name, sha256(text)).
+    Vectors are stored as float32 blobs; the least recently used rows are evicted past `max_entries`.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str,
+                 cache_path: str = "data/embedding_cache.sqlite", max_entries: int = 200_000):
+        self.log = CustomLogger().get_logger(__name__)
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._rows = SQLiteLRUCache(cache_path, "embedding_vectors", max_entries, name="embedding")
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _lookup(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        rows = self._rows.get_many(f"{model}:{h}" for h in hashes)
+        prefix = len(model) + 1
+        return {key[prefix:]: array("f", blob).tolist() for key, blob in rows.items()}
+
+    def _store(self, model: str, vectors: Dict[str, List[float]]) -> None:
+        self._rows.put_many({f"{model}:{h}": array("f", v).tobytes() for h, v in vectors.items()})
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [self._hash(t) for t in texts]
+        cached = self._lookup(self.model_name, hashes)
+
+        # embed each unseen text once, even if it repeats within the batch
+        missing = {}
+        for text_hash, text in zip(hashes, texts):
+            if text_hash not in cached and text_hash not in missing:
+                missing[text_hash] = text
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self._store(self.model_name, fresh)
+            cached.update(fresh)
+
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+        self.log.info("Embedding cache lookup", texts=len(texts), misses=len(missing))
+        return [cached[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_query_cached(text)[0]
+
+    def embed_query_cached(self, text: str) -> Tuple[List[float], bool]:
+        """
+        `embed_query` that also says whether this call was served from the cache.
+        :return: (vector, cache hit)
+        """
+        # providers may embed queries differently from documents, so keep them apart
+        model = f"{self.model_name}:query"
+        text_hash = self._hash(text)
+        cached = self._lookup(model, [text_hash])
+        if text_hash in cached:
+            with self._lock:
+                self.hits += 1
+            return cached[text_hash], True
+
+        vector = self.embeddings.embed_query(text)
+        self._store(model, {text_hash: vector})
+        with self._lock:
+            self.misses += 1
+        return vector, False
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Hit/miss counters since this wrapper was created."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else None,
+        }
@@ -0,0 +1,164 @@
+import sys
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Iterator, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+from log_utils.custom_logging import CustomLogger
+from exception.custom_exeption import CustomException
+from utils.tokens import estimate_tokens
+
+
+# openai / groq / anthropic and google-api-core rate-limit exception types
+_RATE_LIMIT_ERRORS = {"RateLimitError", "ResourceExhausted", "TooManyRequests"}
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """
+    Provider 429 / quota error across SDKs, judged by HTTP status or exception type. SDK
+    wrappers raise from the original error, so the whole cause chain is checked.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        for attr in ("status_code", "code", "http_status"):
+            if getattr(error, attr, None) == 429:
+                return True
+        response = getattr(error, "response", None)
+        if getattr(response, "status_code", None) == 429:
+            return True
+        if type(error).__name__ in _RATE_LIMIT_ERRORS:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class EmbeddingCancelled(Exception):
+    """Raised inside a worker whose `iter_embeddings` call has already stopped."""
+
+
+class EmbeddingExecutor:
+    """
+    Embeds texts in token-bounded batches on a bounded thread pool.
+    Batches are yielded as they finish; a 429 from any worker pauses all of them
+    for a shared, growing backoff that decays again after successful calls.
+    """
+
+    def __init__(self, embeddings: Embeddings, batch_size: int = 64, max_batch_tokens: int = 8000,
+                 concurrency: int = 4, max_retries: int = 6, base_backoff: float = 1.0, max_backoff: float = 60.0):
+        self.log = CustomLogger().get_logger(__name__)
+        self.embeddings = embeddings
+        self.batch_size = max(1, batch_size)
+        self.max_batch_tokens = max(1, max_batch_tokens)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        self._backoff = 0.0
+        self._cooldown_until = 0.0
+
+    @classmethod
+    def from_config(cls, embeddings: Embeddings, embedding_config: dict) -> "EmbeddingExecutor":
+        """Build from the `embedding_model` block of config.yaml."""
+        return cls(
+            embeddings,
+            batch_size=embedding_config.get("batch_size", 64),
+            max_batch_tokens=embedding_config.get("max_batch_tokens", 8000),
+            concurrency=embedding_config.get("concurrency", 4),
+            max_retries=embedding_config.get("max_retries", 6),
+        )
+
+    def make_batches(self, texts: List[str]) -> List[List[int]]:
+        """
+        Pack text positions into batches capped by both count and estimated tokens.
+        :param texts: texts to embed
+        :return: list of batches, each a list of positions into `texts`
+        """
+        batches, current, current_tokens = [], [], 0
+        for position, text in enumerate(texts):
+            tokens = estimate_tokens(text)
+            if current and (len(current) >= self.batch_size or current_tokens + tokens > self.max_batch_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(position)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _wait_for_cooldown(self, stop: Optional[threading.Event] = None) -> None:
+        with self._lock:
+            delay = self._cooldown_until - time.monotonic()
+        if stop is None:
+            if delay > 0:
+                time.sleep(delay)
+        elif stop.wait(max(delay, 0)) or stop.is_set():
+            raise EmbeddingCancelled()
+
+    def _on_rate_limited(self) -> float:
+        with self._lock:
+            self._backoff = min(self.max_backoff, self._backoff * 2 if self._backoff else self.base_backoff)
+            delay = self._backoff * (1 + random.random() * 0.25)
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+            return delay
+
+    def _on_success(self) -> None:
+        with self._lock:
+            self._backoff /= 2
+            if self._backoff < self.base_backoff / 4:
+                self._backoff = 0.0
+
+    def _embed_batch(self, texts: List[str], stop: Optional[threading.Event] = None) -> List[List[float]]:
+        """
+        Embed one batch, retrying rate limits with the shared backoff.
+        :param stop: set once the caller gives up; the next attempt or backoff wait then ends the batch
+        """
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_cooldown(stop)
+            try:
+                vectors = self.embeddings.embed_documents(texts)
+                self._on_success()
+                return vectors
+            except Exception as e:
+                if not is_rate_limited(e) or attempt == self.max_retries:
+                    raise
+                delay = self._on_rate_limited()
+                self.log.warning("Embedding rate limited, backing off", attempt=attempt + 1, delay=round(delay, 2))
+        raise RuntimeError("unreachable")
+
+    def iter_embeddings(self, texts: List[str]) -> Iterator[Tuple[List[int], List[List[float]]]]:
+        """
+        Embed `texts`, yielding (positions, vectors) per batch in completion order.
+        At most `concurrency * 2` batches are in flight, so memory stays bounded.
+        When a batch fails for good, or the caller stops iterating, queued batches are cancelled
+        and running ones stop before their next retry instead of being waited for.
+        """
+        batches = self.make_batches(texts)
+        self.log.info("Embedding batches scheduled", texts=len(texts), batches=len(batches), concurrency=self.concurrency)
+        stop = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="embed")
+        try:
+            pending = {}
+            queue = iter(batches)
+            for batch in queue:
+                pending[pool.submit(self._embed_batch, [texts[i] for i in batch], stop)] = batch
+                if len(pending) >= self.concurrency * 2:
+                    break
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = pending.pop(future)
+                    yield batch, future.result()
+                    next_batch = next(queue, None)
+                    if next_batch is not None:
+                        pending[pool.submit(self._embed_batch, [texts[i] for i in next_batch], stop)] = next_batch
+        except Exception as e:
+            self.log.error("Embedding executor failed", error=str(e))
+            raise CustomException("Embedding executor failed", sys)
+        finally:
+            stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -1,40 +1,162 @@
 import os
 import sys
+import importlib
+import threading
+from pathlib import Path
+from typing import Optional
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-# from openai.types import embedding_model
 from utils.config_loader import load_config
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_groq import ChatGroq
+from utils.embedding_cache import CachedEmbeddings
+
+# provider -> (module, class). SDKs are imported on first use, so only the configured ones are ever loaded.
+LLM_BACKENDS = {
+    "groq": ("langchain_groq", "ChatGroq"),
+    "google": ("langchain_google_genai", "ChatGoogleGenerativeAI"),
+    "openai": ("langchain_openai", "ChatOpenAI"),
+}
+EMBEDDING_BACKENDS = {
+    "google": ("langchain_google_genai", "GoogleGenerativeAIEmbeddings"),
+}
+# provider -> environment variable holding its API key
+PROVIDER_KEYS = {
+    "groq": "GROQ_API_KEY",
+    "google": "GOOGLE_API_KEY",
+    "openai": "OPENAI_API_KEY",
+}
+
+
+def _import_backend(backends: dict, provider: str):
+    if provider not in backends:
+        raise ValueError(f"Unknown provider: {provider}")
+    module_name, class_name = backends[provider]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parent.parent / "config" / "config.yaml"
+
+
+class _ModelRegistry:
+    """
+    Process-wide memo shared by every ModelLoader: .env is read once,
+    each config file is parsed once per modification, and one client is built per
+    (kind, provider, model, params) so sessions reuse warm connection pools.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._api_keys = None
+        self._configs = {}  # path -> (mtime_ns, parsed config)
+        self._clients = {}  # (config path, kind, provider, model, params...) -> client
+        # key -> lock held while that client is built, so a slow build only blocks callers of the same key
+        self._build_locks = {}
+        self._generation = 0  # bumped whenever clients are dropped; a build started before is not published
+
+    def api_keys(self) -> dict:
+        """Every provider's key from the environment (or .env), None where unset."""
+        with self._lock:
+            if self._api_keys is None:
+                load_dotenv()
+                self._api_keys = {key: os.getenv(key) for key in PROVIDER_KEYS.values()}
+            return self._api_keys
+
+    def config(self, config_path: Path) -> dict:
+        """Parsed config, re-read (and its clients dropped) when the file changes on disk."""
+        key = str(config_path)
+        mtime = config_path.stat().st_mtime_ns
+        with self._lock:
+            cached = self._configs.get(key)
+            if cached is None or cached[0] != mtime:
+                self._configs[key] = (mtime, load_config(config_path=key))
+                self._clients = {k: v for k, v in self._clients.items() if k[0] != key}
+                self._generation += 1
+            return self._configs[key][1]
+
+    def client(self, key: tuple, factory):
+        """The client for `key`, built by `factory` outside the registry lock on first use."""
+        with self._lock:
+            if key in self._clients:
+                return self._clients[key]
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        with build_lock:
+            with self._lock:
+                if key in self._clients:  # built by the thread we waited for
+                    return self._clients[key]
+                generation = self._generation
+            client = factory()
+            with self._lock:
+                if generation == self._generation:
+                    self._clients[key] = client
+                self._build_locks.pop(key, None)
+            return client
+
+    def clear(self) -> None:
+        """Forget everything; the next ModelLoader re-reads .env and config."""
+        with self._lock:
+            self._api_keys = None
+            self._configs.clear()
+            self._clients.clear()
+            self._generation += 1
+
+
+_REGISTRY = _ModelRegistry()
+
 
 class ModelLoader:
     """
     An Utility class to load embedding and LLM models.
+    Config and clients are memoized process-wide, so constructing one is cheap.
     """
-    def __init__(self):
-        load_dotenv()
+    def __init__(self, config_path: Optional[str] = None):
+        self.config_path = Path(config_path) if config_path else DEFAULT_CONFIG_PATH
         self._validate_env()
-        self.config = load_config(config_path="C:\\Users\\302sy\\Desktop\\Generative AI\\StockSnapAI\\config\\config.yaml")
+        self.config = _REGISTRY.config(self.config_path)
+
     def _validate_env(self):
         """
-        Validate the environment variables.
-        Ensure API key is set correctly.
+        Read the API keys from the environment. A key is only required once a client
+        of its provider is built, so a process using one provider needs only that key.
         :return:
         """
-        required_vars= ["GOOGLE_API_KEY", "OPENAI_API_KEY", "GROQ_API_KEY"]
-        self.api_key = {key: os.getenv(key) for key in required_vars}
-        missing= [k for k, v in self.api_key.items() if not v]
-        if missing:
-            raise EnvironmentError("Environment variables not set.")
+        self.api_key = _REGISTRY.api_keys()
+
+    def _require_key(self, provider):
+        """
+        API key for `provider`.
+        :raises EnvironmentError: when it is not set
+        """
+        env_var= PROVIDER_KEYS.get(provider)
+        if env_var is None:
+            raise ValueError(f"Unknown provider: {provider}")
+        if not self.api_key.get(env_var):
+            raise EnvironmentError(f"Environment variable {env_var} not set.")
+        return self.api_key[env_var]
 
     def load_embedding_model(self):
         """
-        load and return the embedding model.
+        load and return the embedding model, wrapped in the on-disk cache when enabled.
         :return:
         """
-        model_name= self.config["embedding_model"]["model_name"]
-        return GoogleGenerativeAIEmbeddings(model= model_name)
+        embedding_block= self.config["embedding_model"]
+        model_name= embedding_block["model_name"]
+        cache_config= embedding_block.get("cache", {})
+
+        provider= embedding_block.get("provider", "google")
+
+        def build():
+            self._require_key(provider)
+            embeddings= _import_backend(EMBEDDING_BACKENDS, provider)(model= model_name)
+            if not cache_config.get("enabled", False):
+                return embeddings
+            return CachedEmbeddings(
+                embeddings,
+                model_name= model_name,
+                cache_path= cache_config.get("path", "data/embedding_cache.sqlite"),
+                max_entries= cache_config.get("max_entries", 200_000),
+            )
+
+        key= (str(self.config_path), "embedding", provider, model_name,
+              tuple(sorted(cache_config.items())))
+        return _REGISTRY.client(key, build)
 
     def load_llm(self, model_name= "groq"):
         """Initiate and load the LLM model."""
@@ -50,24 +172,30 @@ class ModelLoader:
         else:
             raise EnvironmentError("Model not found")
 
+        key= (str(self.config_path), "llm", provider, model_name, temperature, max_tokens)
+        return _REGISTRY.client(key, lambda: self._build_llm(provider, model_name, temperature))
+
+    def _build_llm(self, provider, model_name, temperature):
+        chat_model= _import_backend(LLM_BACKENDS, provider)
+        api_key= self._require_key(provider)
         if provider == "groq":
-            llm= ChatGroq(
+            llm= chat_model(
                 model= model_name,
-                api_key= self.api_key["GROQ_API_KEY"],
+                api_key= api_key,
                 temperature= temperature,
             )
             return llm
         elif provider == "google":
-            llm= ChatGoogleGenerativeAI(
+            llm= chat_model(
                 model= model_name,
                 temperature= temperature,
-                google_api_key= self.api_key["GOOGLE_API_KEY"],
+                google_api_key= api_key,
             )
             return llm
         elif provider == "openai":
-            llm= ChatOpenAI(
+            llm= chat_model(
                 model= model_name,
-                api_key= self.api_key["OPENAI_API_KEY"],
+                api_key= api_key,
             )
             return llm
         else:
@@ -0,0 +1,63 @@
+import time
+import threading
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate_per_minute` requests on average, bursts of up to `burst`.
+    `cooldown` blocks every caller for a while, e.g. after the provider answered 429.
+    A bucket with no rate only enforces cooldowns.
+    """
+
+    def __init__(self, rate_per_minute: Optional[float] = None, burst: int = 1):
+        self.rate = rate_per_minute / 60.0 if rate_per_minute else None
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._cooldown_until = 0.0
+        self._lock = threading.Lock()
+
+    def _delay(self, now: float) -> float:
+        """Seconds until a token is available; takes it when that is now."""
+        if now < self._cooldown_until:
+            return self._cooldown_until - now
+        if self.rate is None:
+            return 0.0
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout: Optional[float] = None, stop: Optional[threading.Event] = None) -> bool:
+        """
+        Take one token, waiting for it for at most `timeout` seconds (forever when None).
+        :param stop: event that aborts the wait when set
+        :return: True when a token was taken
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                delay = self._delay(now)
+            if delay == 0:
+                return True
+            if deadline is not None and now + delay > deadline:
+                return False
+            if stop is not None:
+                if stop.wait(delay):
+                    return False
+            else:
+                time.sleep(delay)
+
+    def cooldown(self, seconds: float) -> None:
+        """Hold every caller for `seconds` from now (extends, never shortens, a running cooldown)."""
+        with self._lock:
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + seconds)
+
+    def cooling_down(self) -> float:
+        """Seconds left in the current cooldown, 0 when none."""
+        with self._lock:
+            return max(0.0, self._cooldown_until - time.monotonic())
@@ -0,0 +1,91 @@
+import sys
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from log_utils.custom_logging import CustomLogger
+from exception.custom_exeption import CustomException
+
+
+class SQLiteLRUCache:
+    """
+    Thread-safe key -> value table in a SQLite file, shared by every process on the machine.
+    Reads refresh a row's last access; the least recently used rows are evicted past `max_entries`.
+    Values are stored as given (text or bytes).
+    """
+
+    _BATCH = 500  # stay under SQLite's bound-variable limit
+
+    def __init__(self, path: str, table: str, max_entries: int, name: Optional[str] = None):
+        """
+        :param path: SQLite file, created with its parent directories if missing
+        :param table: table holding this cache's rows
+        :param max_entries: rows kept
+        :param name: what the cache holds, for log and error messages; `table` when None
+        """
+        self.log = CustomLogger().get_logger(__name__)
+        self.table = table
+        self.max_entries = max_entries
+        self.name = name or table
+        self._lock = threading.Lock()
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"""CREATE TABLE IF NOT EXISTS {table} (
+                       key TEXT PRIMARY KEY,
+                       value BLOB NOT NULL,
+                       last_access REAL NOT NULL)"""
+            )
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_access ON {table}(last_access)")
+            self._conn.commit()
+        except Exception as e:
+            self.log.error(f"Failed to open {self.name} cache", path=path, error=str(e))
+            raise CustomException(f"Failed to open {self.name} cache", sys)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Values of the keys present, marking them as recently used."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), self._BATCH):
+                batch = keys[start:start + self._BATCH]
+                marks = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM {self.table} WHERE key IN ({marks})", batch
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(f"UPDATE {self.table} SET last_access = ? WHERE key = ?",
+                                       [(now, key) for key in found])
+                self._conn.commit()
+        return found
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Dict[str, Any]) -> None:
+        """Insert or replace rows, then evict the least recently used past `max_entries`."""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, last_access) VALUES (?, ?, ?)",
+                [(key, value, now) for key, value in items.items()],
+            )
+            excess = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE rowid IN "
+                    f"(SELECT rowid FROM {self.table} ORDER BY last_access LIMIT ?)",
+                    (excess,),
+                )
+            self._conn.commit()
+
+    def put(self, key: str, value: Any) -> None:
+        self.put_many({key: value})
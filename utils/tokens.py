@@ -0,0 +1,7 @@
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token) used for budgeting without a tokenizer.
+    :param text: input text
+    :return: approximate token count
+    """
+    return max(1, len(text) // 4)